@@ -1,3 +1,3 @@
-from .analyzer import IframeAnalyzer
+from .analyzer import IframeAnalyzer, load_template_dataframe
 
-__all__ = ['IframeAnalyzer']
+__all__ = ['IframeAnalyzer', 'load_template_dataframe']
\ No newline at end of file
@@ -1,21 +1,101 @@
 import pandas as pd
-from typing import List, Dict, Optional
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from typing import List, Dict, Optional, Tuple
 import json
-from ..utils import extract_id_and_code
+import re
+from bisect import bisect_left
+from functools import lru_cache
+from operator import itemgetter
+from types import MappingProxyType
+from ..utils import CODE_PATTERN
 
-class IframeAnalyzer:
-    def __init__(self):
-        self.template_mapping = self._load_template_mapping()
+@lru_cache(maxsize=1)
+def _read_template_mapping():
+    """Lit le fichier JSON de mapping des templates (une seule lecture réussie par processus)"""
+    from ..utils import get_data_file_path
+    json_path = get_data_file_path("template_mapping.json")
+    with open(json_path, "r") as f:
+        # Vue en lecture seule : le dictionnaire en cache est partagé par toutes les instances
+        return MappingProxyType(json.load(f))
+
+def _load_template_mapping():
+    """Charge le mapping des templates, ou None si le fichier est illisible"""
+    try:
+        # Une exception n'est pas mise en cache : la lecture sera retentée au prochain appel
+        return _read_template_mapping()
+    except Exception:
+        return None
 
-    def _load_template_mapping(self):
-        """Charge le fichier JSON de mapping des templates"""
+def load_template_dataframe() -> pd.DataFrame:
+    """Mapping des templates sous forme de DataFrame, pour les feuilles d'export"""
+    # Même lecture en cache que IframeAnalyzer : le fichier JSON n'est pas relu à chaque rerun
+    template_mapping = _load_template_mapping()
+    if template_mapping is None:
+        raise ValueError("Template mapping file could not be loaded")
+    
+    # Construction colonne par colonne, sans dict intermédiaire par ligne
+    return pd.DataFrame({
+        "Form ID": list(template_mapping.keys()),
+        "Template Name": list(template_mapping.values())
+    })
+
+def _results_to_columns(results: List[Dict]) -> pd.DataFrame:
+    """Construit le DataFrame colonne par colonne à partir des résultats d'extraction"""
+    columns = list(results[0])
+    # Cas courant : tous les résultats ont les mêmes clés, on remplit une liste par colonne
+    if all(len(r) == len(columns) for r in results):
         try:
-            from ..utils import get_data_file_path
-            json_path = get_data_file_path("template_mapping.json")
-            with open(json_path, "r") as f:
-                return json.load(f)
-        except Exception:
-            return None
+            return pd.DataFrame({col: list(map(itemgetter(col), results)) for col in columns})
+        except KeyError:
+            pass
+    # Résultats hétérogènes : construction générique ligne par ligne
+    return pd.DataFrame(results)
+
+def _concat_keys(left: pd.Series, right: pd.Series) -> pd.Series:
+    """Construit la clé composite 'gauche||droite' en un seul noyau Arrow
+    (une valeur manquante d'un côté donne une clé manquante, comme avec '+')"""
+    joined = pc.binary_join_element_wise(
+        pa.array(left, type=pa.string(), from_pandas=True),
+        pa.array(right, type=pa.string(), from_pandas=True),
+        '||'
+    )
+    return pd.Series(pd.arrays.ArrowStringArray(joined), index=left.index)
+
+# Détection des rôles de colonnes du mapping : "crm" et ("code" ou "campaign"), dans
+# n'importe quel ordre, et "cluster" (insensible à la casse)
+CRM_COLUMN_PATTERN = re.compile(r'^(?=.*crm)(?=.*(?:code|campaign))', re.IGNORECASE | re.DOTALL)
+CLUSTER_COLUMN_PATTERN = re.compile(r'cluster', re.IGNORECASE)
+
+@lru_cache(maxsize=8)
+def _detect_mapping_columns(columns: Tuple[str, ...]) -> Tuple[Optional[str], Optional[str]]:
+    """Détecte les colonnes CRM et Cluster d'un fichier de mapping (la dernière
+    colonne correspondante l'emporte) ; mis en cache par liste de colonnes"""
+    crm_column = None
+    cluster_column = None
+    
+    for col in columns:
+        if CRM_COLUMN_PATTERN.search(col):
+            crm_column = col
+        elif CLUSTER_COLUMN_PATTERN.search(col):
+            cluster_column = col
+    
+    return crm_column, cluster_column
+
+def _series_to_dict(keys: pd.Series, values) -> Dict:
+    """Construit un dictionnaire clé -> valeur ; comme avec dict(zip(...)),
+    la dernière occurrence d'une clé l'emporte"""
+    series = pd.Series(values, index=keys.to_numpy())
+    return series[~series.index.duplicated(keep='last')].to_dict()
+
+class IframeAnalyzer:
+    def __init__(self):
+        self.template_mapping = _load_template_mapping()
+        # Ensemble des IDs de templates pour des tests d'appartenance en O(1)
+        self._template_ids_set = frozenset(self.template_mapping) if self.template_mapping else frozenset()
+        # Mapping ID -> template sous forme de Series pour un lookup vectorisé
+        self._template_series = pd.Series(dict(self.template_mapping), dtype=object) if self.template_mapping else None
 
     def get_template_name(self, form_id: str) -> Optional[str]:
         """Récupère le nom du template pour un ID donné"""
@@ -42,15 +122,19 @@ class IframeAnalyzer:
             return pd.DataFrame(columns=['URL source', 'Iframe', 'Form ID', 'CRM Campaign', 'Template'])
         
         # Créer le DataFrame de base
-        df = pd.DataFrame(results)
+        df = _results_to_columns(results)
+        
+        # Colonnes clés en chaînes Arrow : normalisation (.str) et hachage sur buffers contigus
+        for col in ('URL source', 'Iframe', 'Form ID'):
+            df[col] = df[col].astype('string[pyarrow]')
         
-        # Extraction des codes CRM de l'URL
-        df['CRM Campaign'] = df['Iframe'].apply(
-            lambda x: extract_id_and_code(x)[1])
+        # Extraction des codes CRM de l'URL (vectorisée), en chaînes nullables dès le départ :
+        # même dtype et mêmes valeurs manquantes avec ou sans mapping URL
+        df['CRM Campaign'] = self._as_crm_string(df['Iframe'].str.extract(CODE_PATTERN, expand=False))
         
-        # Ajout des noms de template
-        if 'Form ID' in df.columns and self.template_mapping:
-            df['Template'] = df['Form ID'].apply(self.get_template_name)
+        # Ajout des noms de template (lookup dictionnaire vectorisé)
+        if 'Form ID' in df.columns and self._template_series is not None:
+            df['Template'] = df['Form ID'].map(self._template_series)
 
         # === ÉTAPE 1: Appliquer le mapping URL si disponible ===
         if url_mapping_data is not None and url_mapping_config is not None:
@@ -60,9 +144,22 @@ class IframeAnalyzer:
         if crm_data is not None and crm_mapping_config is not None:
             df = self._apply_crm_mapping(df, crm_data, crm_mapping_config)
         
+        # Colonnes très répétitives stockées en catégories (codes entiers au lieu de chaînes)
+        for col in ('Form ID', 'Template'):
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+        
         return df
 
 
+    @staticmethod
+    def _as_crm_string(codes: pd.Series) -> pd.Series:
+        """Convertit les codes CRM en chaînes nullables : les valeurs manquantes restent
+        <NA> (au lieu des chaînes 'None'/'nan' de astype(str)), y compris les valeurs
+        de substitution textuelles venant des fichiers importés"""
+        codes = codes.astype('string')
+        return codes.mask(codes.isin(['None', 'NONE', 'NaN', 'NAN', 'none', 'nan']))
+
     def _apply_url_mapping(self, df: pd.DataFrame, mapping_data: pd.DataFrame, 
                        mapping_config: Dict) -> pd.DataFrame:
         """Applique le mapping basé sur les priorités: 
@@ -73,8 +170,8 @@ class IframeAnalyzer:
         5. ID seul (en excluant les IDs des form templates)
         """
         
-        # Préparation du mapping
-        mapping_df = mapping_data.copy()
+        # Préparation du mapping (colonnes de normalisation calculées en Series locales,
+        # sans copie du DataFrame de mapping)
         url_col = mapping_config['url_column']
         iframe_col = mapping_config.get('iframe_column', None)
         id_col = mapping_config.get('id_column', None)
@@ -84,162 +181,137 @@ class IframeAnalyzer:
             df['Cluster'] = None
         
         # DÉTECTION AUTOMATIQUE des colonnes importantes
-        crm_column = None
-        cluster_column = None
+        crm_column, cluster_column = _detect_mapping_columns(tuple(mapping_data.columns))
+        
+        # Colonnes à compléter : (colonne cible dans l'extraction, colonne source dans le mapping)
+        target_columns = []
+        if crm_column:
+            target_columns.append(('CRM Campaign', crm_column))
+        if cluster_column:
+            target_columns.append(('Cluster', cluster_column))
+        if mapping_config and 'selected_columns' in mapping_config:
+            target_columns.extend(
+                (col, col) for col in mapping_config['selected_columns']
+                if col != crm_column and col != cluster_column
+            )
         
-        for col in mapping_df.columns:
-            if 'crm' in col.lower() and ('code' in col.lower() or 'campaign' in col.lower()):
-                crm_column = col
-            elif 'cluster' in col.lower():
-                cluster_column = col
+        # Créer les colonnes cibles absentes et repérer, pour chacune, les lignes à compléter
+        needs_fill = {}
+        for target_col, _ in target_columns:
+            if target_col not in df.columns:
+                df[target_col] = None
+            needs_fill[target_col] = df[target_col].isna() | df[target_col].isin(["None", ""])
+        
+        # Aucune valeur manquante : inutile de construire les tables de mapping
+        if not any(mask.any() for mask in needs_fill.values()):
+            if 'CRM Campaign' in df.columns:
+                df['CRM Campaign'] = self._as_crm_string(df['CRM Campaign'])
+            return df
         
-        # Dictionnaires de mapping pour différentes stratégies
-        combined_mapping = {}  # URL + Iframe
-        iframe_mapping = {}    # Iframe seul
-        url_id_mapping = {}    # URL + ID
-        id_mapping = {}        # ID seul
+        # Seules les colonnes sources réellement demandées sont indexées
+        value_columns = list(dict.fromkeys(
+            source_col for _, source_col in target_columns if source_col in mapping_data.columns
+        ))
         
         # Normalisation pour le matching
-        df['normalized_url'] = df['URL source'].str.lower().str.rstrip('/')
-        df['normalized_iframe'] = df['Iframe'].str.lower()
+        extraction_url = df['URL source'].str.lower().str.rstrip('/')
+        extraction_iframe = df['Iframe'].str.lower()
         
         # Identifier les template IDs pour les exclure du mapping URL+ID et ID seul
-        template_ids = []
-        if self.template_mapping:
-            template_ids = list(self.template_mapping.keys())
+        template_ids = self._template_ids_set
         
         # Préparer les mappings selon les priorités
+        if url_col in mapping_data.columns:
+            mapping_url = mapping_data[url_col].str.lower().str.rstrip('/')
+        
+        if iframe_col and iframe_col in mapping_data.columns:
+            mapping_iframe = mapping_data[iframe_col].str.lower()
+        
+        if id_col in mapping_data.columns:
+            mapping_ids = mapping_data[id_col].astype(str)
+            mapping_is_template_id = mapping_ids.isin(template_ids)
+        
+        # IDs de l'extraction sous forme de chaînes, et masque des IDs de templates
+        form_ids = df['Form ID'].astype(str)
+        is_template_id = form_ids.isin(template_ids)
+        
+        def index_mapping(keys: pd.Series) -> pd.DataFrame:
+            """Indexe les colonnes de valeurs du mapping par clé ; comme pour un
+            dictionnaire, la dernière occurrence d'une clé l'emporte"""
+            indexed = mapping_data.loc[keys.index, value_columns].set_axis(keys, axis=0)
+            return indexed[~indexed.index.duplicated(keep='last')]
+        
+        # Paliers de mapping : (clés de l'extraction encodées en catégories, table indexée).
+        # Chaque recherche se fait sur les valeurs distinctes puis est diffusée aux
+        # lignes via les codes entiers
+        tiers = []
         
         # 1. Mapping URL+Iframe
-        if iframe_col and iframe_col in mapping_df.columns and url_col in mapping_df.columns:
-            mapping_df['normalized_url'] = mapping_df[url_col].str.lower().str.rstrip('/')
-            mapping_df['normalized_iframe'] = mapping_df[iframe_col].str.lower()
-            mapping_df['url_iframe_key'] = mapping_df['normalized_url'] + "||" + mapping_df['normalized_iframe']
-            
-            df['url_iframe_key'] = df['normalized_url'] + "||" + df['normalized_iframe']
-            
-            for col in mapping_df.columns:
-                if col not in ['url_iframe_key', 'normalized_url', 'normalized_iframe']:
-                    combined_mapping[col] = dict(zip(mapping_df['url_iframe_key'], mapping_df[col]))
+        if iframe_col and iframe_col in mapping_data.columns and url_col in mapping_data.columns:
+            mapping_keys = _concat_keys(mapping_url, mapping_iframe)
+            extraction_keys = _concat_keys(extraction_url, extraction_iframe)
+            tiers.append((pd.Categorical(extraction_keys), index_mapping(mapping_keys)))
         
         # 2. Mapping Iframe uniquement
-        if iframe_col and iframe_col in mapping_df.columns:
-            for col in mapping_df.columns:
-                if col not in ['normalized_url', 'normalized_iframe', 'url_iframe_key']:
-                    iframe_mapping[col] = dict(zip(mapping_df[iframe_col].str.lower(), mapping_df[col]))
+        if iframe_col and iframe_col in mapping_data.columns:
+            tiers.append((pd.Categorical(extraction_iframe), index_mapping(mapping_iframe)))
         
         # 3. Mapping URL+ID (en excluant les IDs des form templates)
-        if url_col in mapping_df.columns and id_col in mapping_df.columns:
+        if url_col in mapping_data.columns and id_col in mapping_data.columns:
             # Créer une clé combinée URL+ID pour les lignes dont l'ID n'est pas un template ID
-            mapping_df['url_id_filtered'] = mapping_df.apply(
-                lambda row: mapping_df.loc[row.name, 'normalized_url'] + "||" + str(row[id_col]) 
-                            if str(row[id_col]) not in template_ids else None, 
-                axis=1
-            )
+            mapping_keys = _concat_keys(mapping_url, mapping_ids).where(~mapping_is_template_id)
             
-            # Créer la même clé dans le DataFrame d'extraction
-            df['url_id_filtered'] = df.apply(
-                lambda row: row['normalized_url'] + "||" + str(row['Form ID']) 
-                            if str(row['Form ID']) not in template_ids else None, 
-                axis=1
-            )
+            # Créer la même clé dans le DataFrame d'extraction (vectorisé)
+            extraction_keys = _concat_keys(extraction_url, form_ids).where(~is_template_id)
             
-            # Créer le dictionnaire de mapping URL+ID filtré
-            for col in mapping_df.columns:
-                if col not in ['normalized_url', 'normalized_iframe', 'url_iframe_key', 'url_id_filtered']:
-                    # Créer un dictionnaire uniquement avec les lignes non-None
-                    valid_keys = mapping_df[mapping_df['url_id_filtered'].notna()]['url_id_filtered']
-                    valid_values = mapping_df[mapping_df['url_id_filtered'].notna()][col]
-                    if not valid_keys.empty:
-                        url_id_mapping[col] = dict(zip(valid_keys, valid_values))
+            # Indexer uniquement les lignes dont la clé n'est pas None
+            tiers.append((pd.Categorical(extraction_keys), index_mapping(mapping_keys.dropna())))
         
         # 4. Mapping ID seul (en excluant les IDs des form templates)
-        if id_col in mapping_df.columns:
-            # Filtrer pour exclure les IDs des templates
-            filtered_mapping_df = mapping_df[~mapping_df[id_col].astype(str).isin(template_ids)]
+        if id_col in mapping_data.columns:
+            mapping_keys = mapping_ids[~mapping_is_template_id]
+            tiers.append((pd.Categorical(form_ids.where(~is_template_id)), index_mapping(mapping_keys)))
+        
+        # Appliquer le mapping colonne par colonne (vectorisé) selon les priorités:
+        # 1. Si déjà présent dans l'extraction, garder cette valeur
+        # 2. Sinon, essayer le mapping URL+Iframe
+        # 3. Sinon, essayer le mapping Iframe seul
+        # 4. Sinon, essayer le mapping URL+ID (excluant les IDs des templates)
+        # 5. Sinon, essayer le mapping ID seul (excluant les IDs des templates)
+        for target_col, source_col in target_columns:
+            # Lignes dont la valeur est manquante
+            missing = needs_fill[target_col].to_numpy()
+            if not missing.any():
+                continue
             
-            for col in mapping_df.columns:
-                if col not in ['normalized_url', 'normalized_iframe', 'url_iframe_key', 'url_id_filtered']:
-                    id_mapping[col] = dict(zip(filtered_mapping_df[id_col].astype(str), filtered_mapping_df[col]))
-        
-        # Appliquer le mapping selon les priorités
-        for idx, row in df.iterrows():
-            # Pour CRM Campaign, respecter la priorité:
-            # 1. Si déjà présent dans l'extraction, garder cette valeur
-            # 2. Sinon, essayer le mapping URL+Iframe
-            # 3. Sinon, essayer le mapping Iframe seul
-            # 4. Sinon, essayer le mapping URL+ID (excluant les IDs des templates)
-            # 5. Sinon, essayer le mapping ID seul (excluant les IDs des templates)
-            
-            if crm_column and (pd.isna(row['CRM Campaign']) or row['CRM Campaign'] == "None" or row['CRM Campaign'] == ""):
-                # Valeur CRM manquante, on peut appliquer le mapping
-                
-                # D'abord essayer par URL+Iframe
-                if 'url_iframe_key' in df.columns and row['url_iframe_key'] in combined_mapping.get(crm_column, {}):
-                    df.loc[idx, 'CRM Campaign'] = combined_mapping[crm_column][row['url_iframe_key']]
-                # Ensuite par Iframe seul
-                elif row['normalized_iframe'] in iframe_mapping.get(crm_column, {}):
-                    df.loc[idx, 'CRM Campaign'] = iframe_mapping[crm_column][row['normalized_iframe']]
-                # Puis par URL+ID (si l'ID n'est pas un template ID)
-                elif ('url_id_filtered' in df.columns and 
-                    pd.notna(row['url_id_filtered']) and 
-                    row['url_id_filtered'] in url_id_mapping.get(crm_column, {})):
-                    df.loc[idx, 'CRM Campaign'] = url_id_mapping[crm_column][row['url_id_filtered']]
-                # Enfin par ID seul (si l'ID n'est pas un template ID)
-                elif str(row['Form ID']) not in template_ids and str(row['Form ID']) in id_mapping.get(crm_column, {}):
-                    df.loc[idx, 'CRM Campaign'] = id_mapping[crm_column][str(row['Form ID'])]
+            # Candidats de chaque palier, par ordre de priorité
+            conditions = []
+            choices = []
+            for keys, table in tiers:
+                if table.empty or source_col not in table.columns:
+                    continue
+                # Une case supplémentaire en fin de tableau absorbe le code -1 (clé manquante)
+                positions = table.index.get_indexer(keys.categories)
+                known = np.append(positions >= 0, False)
+                values = np.empty(len(positions) + 1, dtype=object)
+                values[:-1][known[:-1]] = table[source_col].to_numpy(dtype=object)[positions[known[:-1]]]
+                conditions.append(known[keys.codes])
+                choices.append(values[keys.codes])
             
-            # Traitement pour Cluster et autres colonnes sélectionnées avec les mêmes priorités
-            if cluster_column:
-                if pd.isna(row['Cluster']) or row['Cluster'] == "None" or row['Cluster'] == "":
-                    # D'abord essayer par URL+Iframe
-                    if 'url_iframe_key' in df.columns and row['url_iframe_key'] in combined_mapping.get(cluster_column, {}):
-                        df.loc[idx, 'Cluster'] = combined_mapping[cluster_column][row['url_iframe_key']]
-                    # Ensuite par Iframe seul
-                    elif row['normalized_iframe'] in iframe_mapping.get(cluster_column, {}):
-                        df.loc[idx, 'Cluster'] = iframe_mapping[cluster_column][row['normalized_iframe']]
-                    # Puis par URL+ID (si l'ID n'est pas un template ID)
-                    elif ('url_id_filtered' in df.columns and 
-                        pd.notna(row['url_id_filtered']) and 
-                        row['url_id_filtered'] in url_id_mapping.get(cluster_column, {})):
-                        df.loc[idx, 'Cluster'] = url_id_mapping[cluster_column][row['url_id_filtered']]
-                    # Enfin par ID seul (si l'ID n'est pas un template ID)
-                    elif str(row['Form ID']) not in template_ids and str(row['Form ID']) in id_mapping.get(cluster_column, {}):
-                        df.loc[idx, 'Cluster'] = id_mapping[cluster_column][str(row['Form ID'])]
+            if not conditions:
+                continue
             
-            # Traitement des autres colonnes sélectionnées
-            if mapping_config and 'selected_columns' in mapping_config:
-                selected_cols = [col for col in mapping_config['selected_columns'] 
-                                if col != crm_column and col != cluster_column]
-                
-                for col in selected_cols:
-                    if col not in df.columns:
-                        df[col] = None
-                        
-                    if pd.isna(row[col]) or row[col] == "None" or row[col] == "":
-                        # D'abord essayer par URL+Iframe
-                        if 'url_iframe_key' in df.columns and row['url_iframe_key'] in combined_mapping.get(col, {}):
-                            df.loc[idx, col] = combined_mapping[col][row['url_iframe_key']]
-                        # Ensuite par Iframe seul
-                        elif row['normalized_iframe'] in iframe_mapping.get(col, {}):
-                            df.loc[idx, col] = iframe_mapping[col][row['normalized_iframe']]
-                        # Puis par URL+ID (si l'ID n'est pas un template ID)
-                        elif ('url_id_filtered' in df.columns and 
-                            pd.notna(row['url_id_filtered']) and 
-                            row['url_id_filtered'] in url_id_mapping.get(col, {})):
-                            df.loc[idx, col] = url_id_mapping[col][row['url_id_filtered']]
-                        # Enfin par ID seul (si l'ID n'est pas un template ID)
-                        elif str(row['Form ID']) not in template_ids and str(row['Form ID']) in id_mapping.get(col, {}):
-                            df.loc[idx, col] = id_mapping[col][str(row['Form ID'])]
+            # Le premier palier où la clé existe l'emporte, même si sa valeur est vide :
+            # np.select retient le premier candidat valide, écrit en une seule fois
+            found = missing & np.logical_or.reduce(conditions)
+            if found.any():
+                # Remplissage en dtype objet : les valeurs du mapping ne sont pas forcément
+                # des chaînes (les codes CRM sont reconvertis en chaînes nullables ensuite)
+                df[target_col] = df[target_col].astype(object).mask(found, np.select(conditions, choices, default=None))
         
         # Assurer la cohérence des types de données
         if 'CRM Campaign' in df.columns:
-            df['CRM Campaign'] = df['CRM Campaign'].astype(str)
-        
-        # Nettoyage des colonnes temporaires
-        for col in ['normalized_url', 'normalized_iframe', 'url_iframe_key', 'url_id_filtered']:
-            if col in df.columns:
-                df = df.drop(col, axis=1)
+            df['CRM Campaign'] = self._as_crm_string(df['CRM Campaign'])
         
         return df
 
@@ -249,8 +321,6 @@ class IframeAnalyzer:
         
         """Applique le mapping basé sur les codes de campagne CRM avec logique 'starts with'"""
         
-        import numpy as np
-        
         if 'CRM Campaign' not in df.columns:
             return df
             
@@ -268,22 +338,15 @@ class IframeAnalyzer:
         if not selected_columns:
             return df
         
-        # CORRECTION DES VALEURS SPÉCIALES DANS LE DATAFRAME D'EXTRACTION
-        # Remplacer 'None', 'NaN', etc. par des NaN véritables
-        df['CRM Campaign'] = df['CRM Campaign'].replace(['None', 'NONE', 'NaN', 'NAN', 'none', 'nan'], np.nan)
-        
         # NORMALISATION DES CODES CRM
-        # Créer une colonne normalisée pour les codes CRM, en excluant les NaN
-        df['normalized_crm_code'] = df['CRM Campaign'].astype(str)
-        mask = ~df['CRM Campaign'].isna() & (df['CRM Campaign'] != 'nan')
-        df.loc[mask, 'normalized_crm_code'] = df.loc[mask, 'CRM Campaign'].str.strip().str.upper()
+        # Codes normalisés en une seule expression (les NaN restent NaN et ne matchent rien)
+        normalized_crm_codes = df['CRM Campaign'].str.strip().str.upper()
         
         # Normalisation dans le dataframe CRM
-        crm_data_copy = crm_data.copy()
-        crm_data_copy['normalized_crm_code'] = crm_data_copy[crm_code_col].astype(str).str.strip().str.upper()
+        crm_codes = crm_data[crm_code_col].astype(str).str.strip().str.upper()
         
         # Fonction pour trouver le meilleur match par préfixe
-        def find_best_match(code, code_dict):
+        def find_best_match(code, code_dict, sorted_keys, max_key_length):
             if pd.isna(code) or code == 'nan' or code == 'None':
                 return None
                 
@@ -291,40 +354,41 @@ class IframeAnalyzer:
             if code in code_dict:
                 return code_dict[code]
                 
-            # 2. Essayer une correspondance par préfixe
-            for full_code in code_dict.keys():
-                # Si le code partiel est un préfixe du code complet
-                if full_code.startswith(code):
-                    return code_dict[full_code]
+            # 2. Essayer une correspondance par préfixe : les codes complets commençant
+            # par le code partiel suivent immédiatement sa position dans les clés triées
+            i = bisect_left(sorted_keys, code)
+            if i < len(sorted_keys) and sorted_keys[i].startswith(code):
+                return code_dict[sorted_keys[i]]
                 
-            # 3. Si le code partiel est plus long, vérifier s'il commence par un code connu
-            for full_code in code_dict.keys():
-                if code.startswith(full_code):
-                    return code_dict[full_code]
+            # 3. Si le code partiel est plus long, vérifier s'il commence par un code connu :
+            # on teste ses préfixes du plus long au plus court, en O(L) accès au dictionnaire
+            for length in range(min(len(code) - 1, max_key_length), 0, -1):
+                if code[:length] in code_dict:
+                    return code_dict[code[:length]]
                     
             return None
         
+        # Ligne CRM associée à chaque code normalisé ; le match par préfixe ne dépend
+        # pas de la colonne, il est donc résolu une seule fois pour toutes les colonnes
+        code_rows = _series_to_dict(crm_codes, np.arange(len(crm_codes)))
+        sorted_keys = sorted(code_rows)
+        max_key_length = max(map(len, sorted_keys), default=0)
+        
+        # Codes distincts de l'extraction, résolus une seule fois puis diffusés aux lignes
+        # par leurs codes entiers (-1 : valeur manquante ou aucun match)
+        code_positions, unique_codes = pd.factorize(normalized_crm_codes)
+        matched_rows = [find_best_match(code, code_rows, sorted_keys, max_key_length) for code in unique_codes]
+        row_positions = np.array([-1 if row is None else row for row in matched_rows] + [-1])[code_positions]
+        
         # Appliquer le mapping colonne par colonne avec logique "starts with"
         for col_name in selected_columns:
-            if col_name != crm_code_col and col_name in crm_data_copy.columns:
-                # Créer un dictionnaire de mapping pour cette colonne
-                mapping_dict = dict(zip(crm_data_copy['normalized_crm_code'], crm_data_copy[col_name]))
-                
+            if col_name != crm_code_col and col_name in crm_data.columns:
                 # Nouvelle colonne avec préfixe CRM_
                 new_col_name = f"CRM_{col_name}"
                 
-                # Initialiser la colonne
-                df[new_col_name] = None
-                
-                # Appliquer le mapping avec logique "starts with"
-                for idx, row in df.iterrows():
-                    if pd.notna(row['normalized_crm_code']):
-                        match_value = find_best_match(row['normalized_crm_code'], mapping_dict)
-                        if match_value is not None:
-                            df.loc[idx, new_col_name] = match_value
-        
-        # Nettoyage de la colonne temporaire
-        if 'normalized_crm_code' in df.columns:
-            df = df.drop('normalized_crm_code', axis=1)
+                # Valeurs de la colonne, suivies d'une case None pour les lignes sans match
+                # (dtype objet pour conserver les valeurs telles quelles)
+                values = np.append(crm_data[col_name].to_numpy(dtype=object), None)
+                df[new_col_name] = pd.Series(values[row_positions], index=df.index, dtype=object)
         
         return df
\ No newline at end of file
@@ -17,6 +17,7 @@ class Config:
     LOG_LEVEL = 'INFO'                    # Niveau de logging
     SECURE_HEADERS = True                 # Utiliser des en-têtes HTTP sécurisés
     SANITIZE_OUTPUT = True                # Sanitiser les sorties HTML
+    MAX_HISTORY_ENTRIES = 100             # Entrées conservées dans l'historique (les plus anciennes sont évincées)
     
     # Paramètres de rate limiting
     RATE_LIMIT = True                     # Activer la limitation de requêtes
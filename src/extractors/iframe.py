@@ -1,5 +1,5 @@
 from typing import List, Dict, Optional
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import logging
 from ..config import Config
 from ..utils import create_session, extract_id_and_code, is_valid_url
@@ -11,9 +11,22 @@ logging.basicConfig(
 )
 logger = logging.getLogger('iframe_extractor')
 
+# Seul le contenu de <body> est utile : le <head> (scripts, styles) n'est pas construit
+BODY_STRAINER = SoupStrainer("body")
+
+# Préfixe des iframes recherchées, testé sur les octets bruts avant tout parsing
+IFRAME_SRC_PREFIX = "https://ovh.slgnt.eu/optiext/"
+IFRAME_SRC_MARKER = IFRAME_SRC_PREFIX.encode("ascii")
+
+# Taille des blocs lus sur le flux HTTP
+STREAM_CHUNK_SIZE = 64 * 1024
+
 class IframeExtractor:
     def __init__(self):
         self.session = create_session()
+        # Valeurs figées à la création : Config.update() intervient avant chaque extraction
+        self._timeout = Config.TIMEOUT
+        self._max_content_size = Config.MAX_CONTENT_SIZE
 
     def extract_from_url(self, url: str) -> List[Dict]:
         """Extrait les liens iframe d'une URL donnée de façon sécurisée, en respectant le chemin spécifique."""
@@ -23,27 +36,46 @@ class IframeExtractor:
             return []
 
         try:
-            # Limiter le temps de réponse pour éviter les attaques DoS
-            response = self.session.get(url, timeout=Config.TIMEOUT)
+            # Limiter le temps de réponse pour éviter les attaques DoS ; le corps n'est
+            # téléchargé qu'après les vérifications d'en-têtes
+            response = self.session.get(url, timeout=self._timeout, stream=True)
             
-            # Vérifier le code de statut HTTP
-            if response.status_code != 200:
-                logger.info(f"Non-200 status code ({response.status_code}) for URL: {url}")
-                return []
+            with response:
+                # Vérifier le code de statut HTTP
+                if response.status_code != 200:
+                    logger.info(f"Non-200 status code ({response.status_code}) for URL: {url}")
+                    return []
 
-            # Vérifier le type de contenu
-            content_type = response.headers.get('Content-Type', '')
-            if 'text/html' not in content_type and 'application/xhtml+xml' not in content_type:
-                logger.info(f"Non-HTML content type ({content_type}) for URL: {url}")
-                return []
+                # Vérifier le type de contenu
+                content_type = response.headers.get('Content-Type', '')
+                if 'text/html' not in content_type and 'application/xhtml+xml' not in content_type:
+                    logger.info(f"Non-HTML content type ({content_type}) for URL: {url}")
+                    return []
+
+                # Limite la taille du contenu pour éviter les attaques par épuisement de mémoire
+                max_content_size = self._max_content_size
+                if int(response.headers.get('Content-Length', 0)) > max_content_size:
+                    logger.warning(f"Content too large for URL: {url}")
+                    return []
+
+                # Lecture bornée du corps (Content-Length absent ou erroné)
+                chunks = []
+                received = 0
+                for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                    received += len(chunk)
+                    if received > max_content_size:
+                        logger.warning(f"Content too large for URL: {url}")
+                        return []
+                    chunks.append(chunk)
+                content = b"".join(chunks)
 
-            # Limite la taille du contenu pour éviter les attaques par épuisement de mémoire
-            max_content_size = 10 * 1024 * 1024  # 10 MB
-            if int(response.headers.get('Content-Length', 0)) > max_content_size:
-                logger.warning(f"Content too large for URL: {url}")
+            # Aucune iframe candidate dans la page : inutile de construire l'arbre DOM
+            if IFRAME_SRC_MARKER not in content:
+                logger.debug(f"No optiext iframe in {url}")
                 return []
 
-            soup = BeautifulSoup(response.text, "html.parser")
+            # Parser C lxml directement sur les octets (détection d'encodage par bs4)
+            soup = BeautifulSoup(content, "lxml", parse_only=BODY_STRAINER)
             
             # Uniquement suivre le chemin spécifique, comme dans le code d'origine
             results = []
@@ -57,7 +89,7 @@ class IframeExtractor:
 
                 for iframe in main_section.find_all("iframe"):
                     src = iframe.get("src", "")
-                    if src and src.startswith("https://ovh.slgnt.eu/optiext/"):
+                    if src and src.startswith(IFRAME_SRC_PREFIX):
                         form_id, crm_code = extract_id_and_code(src)
                         # Vérifier que l'ID et le code sont valides
                         if form_id:
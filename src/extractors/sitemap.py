@@ -1,5 +1,5 @@
 import requests
-import xml.etree.ElementTree as ET
+from lxml import etree
 from typing import List
 import logging
 from ..config import Config
@@ -12,70 +12,94 @@ logging.basicConfig(
 )
 logger = logging.getLogger('sitemap_extractor')
 
+# Taille des blocs lus sur le flux HTTP et transmis au parser XML
+STREAM_CHUNK_SIZE = 64 * 1024
+
 class SitemapExtractor:
     def __init__(self):
         self.session = create_session()
     
     def extract_urls(self, sitemap_url: str) -> List[str]:
-        """Extrait les URLs d'un sitemap de façon sécurisée."""
+        """Extrait les URLs d'un sitemap de façon sécurisée, en streaming."""
         # Validation de l'URL du sitemap
         if not is_valid_url(sitemap_url):
             logger.warning(f"Invalid sitemap URL: {sitemap_url}")
             return []
 
         try:
-            # Limiter le temps et la taille de réponse
-            response = self.session.get(sitemap_url, timeout=Config.TIMEOUT)
-            
-            if response.status_code != 200:
-                logger.info(f"Non-200 status code ({response.status_code}) for sitemap: {sitemap_url}")
-                return []
-
-            # Vérification du type de contenu
-            content_type = response.headers.get('Content-Type', '')
-            valid_types = ['text/xml', 'application/xml', 'application/rss+xml', 'application/atom+xml']
-            if not any(valid_type in content_type for valid_type in valid_types):
-                # Vérifier quand même si le contenu ressemble à du XML
-                if not response.text.strip().startswith('<?xml'):
-                    logger.warning(f"Invalid content type for sitemap: {content_type}")
+            # Limiter le temps de réponse ; le corps est lu au fil de l'eau
+            response = self.session.get(sitemap_url, timeout=Config.TIMEOUT, stream=True)
+
+            with response:
+                if response.status_code != 200:
+                    logger.info(f"Non-200 status code ({response.status_code}) for sitemap: {sitemap_url}")
+                    return []
+
+                # Limite la taille du contenu annoncée avant tout téléchargement
+                max_content_size = Config.MAX_CONTENT_SIZE
+                if int(response.headers.get('Content-Length', 0)) > max_content_size:
+                    logger.warning(f"Sitemap content too large: {sitemap_url}")
                     return []
 
-            # Limite la taille du contenu 
-            max_content_size = 10 * 1024 * 1024  # 10 MB
-            if len(response.content) > max_content_size:
-                logger.warning(f"Sitemap content too large: {sitemap_url}")
-                return []
-
-            try:
-                # Utilisation d'un traitement XML sécurisé
-                root = ET.fromstring(response.content)
-                
-                # Détection du namespace
-                ns = None
-                if root.tag.startswith('{'):
-                    ns_end = root.tag.find('}')
-                    if ns_end >= 0:
-                        ns = {'ns': root.tag[1:ns_end]}
-                
+                # Vérification du type de contenu
+                content_type = response.headers.get('Content-Type', '')
+                valid_types = ['text/xml', 'application/xml', 'application/rss+xml', 'application/atom+xml']
+                check_xml_prolog = not any(valid_type in content_type for valid_type in valid_types)
+
+                # Parser incrémental : seuls les éléments <loc> (avec ou sans namespace)
+                # sont émis, et l'arbre est élagué au fur et à mesure
+                parser = etree.XMLPullParser(
+                    events=('end',),
+                    tag='{*}loc',
+                    resolve_entities=False,
+                    no_network=True
+                )
+
                 urls = []
-                if ns:
-                    # Avec namespace
-                    for loc in root.findall('.//ns:loc', ns):
-                        if loc.text and is_valid_url(loc.text):
-                            urls.append(loc.text)
-                else:
-                    # Sans namespace
-                    for loc in root.findall('.//loc'):
-                        if loc.text and is_valid_url(loc.text):
-                            urls.append(loc.text)
-                
-                logger.info(f"Extracted {len(urls)} URLs from sitemap: {sitemap_url}")
-                return urls
-
-            except ET.ParseError as e:
-                logger.error(f"XML parsing error in sitemap {sitemap_url}: {str(e)}")
-                return []
+                received = 0
+                for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                    if not chunk:
+                        continue
+
+                    if check_xml_prolog:
+                        # Vérifier quand même si le contenu ressemble à du XML
+                        if not chunk.lstrip().startswith(b'<?xml'):
+                            logger.warning(f"Invalid content type for sitemap: {content_type}")
+                            return []
+                        check_xml_prolog = False
+
+                    # Limite la taille réellement reçue (Content-Length absent ou erroné)
+                    received += len(chunk)
+                    if received > max_content_size:
+                        logger.warning(f"Sitemap content too large: {sitemap_url}")
+                        return []
 
+                    parser.feed(chunk)
+                    self._collect_locs(parser, urls)
+
+                parser.close()
+                self._collect_locs(parser, urls)
+
+            logger.info(f"Extracted {len(urls)} URLs from sitemap: {sitemap_url}")
+            return urls
+
+        except etree.XMLSyntaxError as e:
+            logger.error(f"XML parsing error in sitemap {sitemap_url}: {str(e)}")
+            return []
         except Exception as e:
             logger.error(f"Error processing sitemap {sitemap_url}: {str(e)}")
-            return []
\ No newline at end of file
+            return []
+
+    @staticmethod
+    def _collect_locs(parser, urls: List[str]) -> None:
+        """Récupère les <loc> parsés puis libère les éléments déjà traités."""
+        for _, loc in parser.read_events():
+            if loc.text and is_valid_url(loc.text):
+                urls.append(loc.text)
+
+            # Libérer le <loc> et les entrées <url>/<sitemap> précédentes
+            loc.clear(keep_tail=True)
+            entry = loc.getparent()
+            if entry is not None:
+                while entry.getprevious() is not None:
+                    del entry.getparent()[0]
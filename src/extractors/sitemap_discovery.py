@@ -1,15 +1,20 @@
 from typing import List, Dict, Any, Optional, Set, Tuple
 import re
 from urllib.parse import urlparse, urljoin
-import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from lxml import etree
 from ..config import Config
 from ..utils import create_session
 
+# Taille des blocs lus sur le flux HTTP et transmis au parser XML
+STREAM_CHUNK_SIZE = 64 * 1024
+
 class SitemapDiscoveryExtractor:
     def __init__(self):
         self.session = create_session()
         self.discovered_sitemaps = []
         self.processed_urls = set()
+        self.checked_sitemaps = {}
     
     def extract_base_url(self, url: str) -> str:
         """Extrait l'URL de base à partir d'une URL complète."""
@@ -45,17 +50,55 @@ class SitemapDiscoveryExtractor:
             "/sitemap.txt"
         ]
         
-        found_sitemaps = []
-        for path in standard_paths:
-            sitemap_url = urljoin(base_url, path)
+        def probe(sitemap_url: str) -> bool:
             try:
                 response = self.session.head(sitemap_url, timeout=Config.TIMEOUT)
-                if response.status_code == 200:
-                    found_sitemaps.append(sitemap_url)
+                return response.status_code == 200
             except Exception:
-                pass
+                return False
+        
+        # Requêtes HEAD indépendantes, lancées en parallèle (l'ordre des chemins est conservé)
+        candidate_urls = [urljoin(base_url, path) for path in standard_paths]
+        with ThreadPoolExecutor(max_workers=len(candidate_urls)) as executor:
+            found = list(executor.map(probe, candidate_urls))
                 
-        return found_sitemaps
+        return [sitemap_url for sitemap_url, ok in zip(candidate_urls, found) if ok]
+    
+    def _iter_sitemap_events(self, sitemap_url: str):
+        """
+        Télécharge un sitemap en streaming et émet les événements ('start'/'end', élément)
+        du parser lxml au fil de la lecture. N'émet rien si le statut n'est pas 200.
+        """
+        response = self.session.get(sitemap_url, timeout=Config.TIMEOUT, stream=True)
+        with response:
+            if response.status_code != 200:
+                return
+            
+            parser = etree.XMLPullParser(events=('start', 'end'), resolve_entities=False, no_network=True)
+            for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                if chunk:
+                    parser.feed(chunk)
+                    yield from parser.read_events()
+            parser.close()
+            yield from parser.read_events()
+    
+    @staticmethod
+    def _namespaced(root_tag: str, name: str) -> str:
+        """Nom de balise qualifié avec le namespace de l'élément racine, s'il en a un."""
+        if root_tag.startswith('{'):
+            ns_end = root_tag.find('}')
+            if ns_end >= 0:
+                return root_tag[:ns_end + 1] + name
+        return name
+    
+    @staticmethod
+    def _release(elem) -> None:
+        """Libère un élément traité ainsi que ses frères précédents."""
+        elem.clear(keep_tail=True)
+        parent = elem.getparent()
+        if parent is not None:
+            while elem.getprevious() is not None:
+                del parent[0]
     
     def check_if_sitemap_index(self, sitemap_url: str) -> Tuple[bool, List[str]]:
         """
@@ -66,41 +109,25 @@ class SitemapDiscoveryExtractor:
         is_index = False
         
         try:
-            response = self.session.get(sitemap_url, timeout=Config.TIMEOUT)
-            if response.status_code != 200:
-                return False, []
-            
-            # Vérifier si c'est un sitemap index (contient des <sitemap> tags)
-            root = ET.fromstring(response.content)
-            
-            # Détecter le namespace
-            ns = None
-            if root.tag.startswith('{'):
-                ns_end = root.tag.find('}')
-                if ns_end >= 0:
-                    ns = {'ns': root.tag[1:ns_end]}
-            
-            # Chercher les balises <sitemap>
-            if ns:
-                sitemaps = root.findall('.//ns:sitemap', ns)
-                if sitemaps:
-                    is_index = True
-                    for sitemap in sitemaps:
-                        loc = sitemap.find('.//ns:loc', ns)
-                        if loc is not None and loc.text:
-                            child_sitemaps.append(loc.text)
-            else:
-                # Sans namespace
-                sitemaps = root.findall('.//sitemap')
-                if sitemaps:
+            sitemap_tag = loc_tag = None
+            for event, elem in self._iter_sitemap_events(sitemap_url):
+                # Détecter le namespace sur l'élément racine
+                if sitemap_tag is None:
+                    sitemap_tag = self._namespaced(elem.tag, 'sitemap')
+                    loc_tag = self._namespaced(elem.tag, 'loc')
+                    continue
+                
+                # Chercher les balises <sitemap> (un index en contient au moins une)
+                if event == 'end' and elem.tag == sitemap_tag:
                     is_index = True
-                    for sitemap in sitemaps:
-                        loc = sitemap.find('.//loc')
-                        if loc is not None and loc.text:
-                            child_sitemaps.append(loc.text)
+                    loc = elem.find('.//' + loc_tag)
+                    if loc is not None and loc.text:
+                        child_sitemaps.append(loc.text)
+                    self._release(elem)
                             
         except Exception:
-            pass
+            # XML invalide ou erreur réseau : rien n'est retenu
+            return False, []
             
         return is_index, child_sitemaps
     
@@ -111,6 +138,7 @@ class SitemapDiscoveryExtractor:
         """
         self.discovered_sitemaps = []
         self.processed_urls = set()
+        self.checked_sitemaps = {}
         
         # Extraire l'URL de base
         base_url = self.extract_base_url(url)
@@ -122,12 +150,42 @@ class SitemapDiscoveryExtractor:
         # Éliminer les doublons
         initial_sitemaps = list(set(initial_sitemaps))
         
-        # Traiter chaque sitemap découvert
+        # Télécharger en parallèle, niveau par niveau, tous les sitemaps atteignables
+        self.checked_sitemaps = self._prefetch_sitemaps(initial_sitemaps, max_depth)
+        
+        # Traiter chaque sitemap découvert (parcours en profondeur sans I/O, pour
+        # conserver l'ordre des entrées et les indices de parents)
         for sitemap_url in initial_sitemaps:
             self._process_sitemap(sitemap_url, 0, max_depth)
             
         return self.discovered_sitemaps
     
+    def _prefetch_sitemaps(self, initial_sitemaps: List[str], max_depth: int) -> Dict[str, Tuple[bool, List[str]]]:
+        """
+        Vérifie en parallèle les sitemaps, par niveaux de profondeur successifs.
+        Retourne pour chaque URL le résultat de check_if_sitemap_index.
+        """
+        checked = {}
+        level = list(dict.fromkeys(initial_sitemaps))
+        depth = 0
+        
+        with ThreadPoolExecutor(max_workers=Config.MAX_WORKERS) as executor:
+            while level:
+                checked.update(zip(level, executor.map(self.check_if_sitemap_index, level)))
+                if depth >= max_depth:
+                    break
+                
+                # Niveau suivant : enfants des index pas encore vérifiés
+                next_level = []
+                for sitemap_url in level:
+                    is_index, child_sitemaps = checked[sitemap_url]
+                    if is_index:
+                        next_level.extend(child for child in child_sitemaps if child not in checked)
+                level = list(dict.fromkeys(next_level))
+                depth += 1
+        
+        return checked
+    
     def _process_sitemap(self, sitemap_url: str, depth: int, max_depth: int) -> None:
         """
         Traite un sitemap découvert et l'ajoute à la liste.
@@ -138,8 +196,11 @@ class SitemapDiscoveryExtractor:
             
         self.processed_urls.add(sitemap_url)
         
-        # Vérifier si c'est un index
-        is_index, child_sitemaps = self.check_if_sitemap_index(sitemap_url)
+        # Vérifier si c'est un index (résultat déjà téléchargé par _prefetch_sitemaps)
+        if sitemap_url in self.checked_sitemaps:
+            is_index, child_sitemaps = self.checked_sitemaps[sitemap_url]
+        else:
+            is_index, child_sitemaps = self.check_if_sitemap_index(sitemap_url)
         
         # Ajouter ce sitemap à la liste
         sitemap_entry = {
@@ -177,42 +238,32 @@ class SitemapDiscoveryExtractor:
         }
         
         try:
-            response = self.session.get(sitemap_url, timeout=Config.TIMEOUT)
-            if response.status_code != 200:
-                return info
+            url_count = 0
+            last_modified = None
+            url_tag = lastmod_tag = None
+            for event, elem in self._iter_sitemap_events(sitemap_url):
+                # Détecter le namespace sur l'élément racine
+                if url_tag is None:
+                    url_tag = self._namespaced(elem.tag, 'url')
+                    lastmod_tag = self._namespaced(elem.tag, 'lastmod')
+                    continue
                 
-            root = ET.fromstring(response.content)
-            
-            # Détecter le namespace
-            ns = None
-            if root.tag.startswith('{'):
-                ns_end = root.tag.find('}')
-                if ns_end >= 0:
-                    ns = {'ns': root.tag[1:ns_end]}
-            
-            # Compter les URLs
-            if ns:
-                urls = root.findall('.//ns:url', ns)
-                info["url_count"] = len(urls)
+                if event != 'end':
+                    continue
                 
                 # Chercher la dernière date de modification
-                lastmods = root.findall('.//ns:lastmod', ns)
-                if lastmods:
-                    dates = [lm.text for lm in lastmods if lm.text]
-                    if dates:
-                        info["last_modified"] = max(dates)
-            else:
-                urls = root.findall('.//url')
-                info["url_count"] = len(urls)
-                
-                # Chercher la dernière date de modification
-                lastmods = root.findall('.//lastmod')
-                if lastmods:
-                    dates = [lm.text for lm in lastmods if lm.text]
-                    if dates:
-                        info["last_modified"] = max(dates)
+                if elem.tag == lastmod_tag:
+                    if elem.text and (last_modified is None or elem.text > last_modified):
+                        last_modified = elem.text
+                # Compter les URLs
+                elif elem.tag == url_tag:
+                    url_count += 1
+                    self._release(elem)
+            
+            info["url_count"] = url_count
+            info["last_modified"] = last_modified
                 
         except Exception:
             pass
             
-        return info
\ No newline at end of file
+        return info
@@ -1,47 +1,90 @@
 import streamlit as st
-from typing import Dict, Any
+from collections import deque
+from typing import Optional, TypedDict
+from ..config import Config
+
+# Valeurs initiales de la session : une fabrique (callable) évite de partager un objet mutable
+_DEFAULTS = (
+    ('extraction_results', None),
+    ('analyzed_results', None),
+    ('analyzed_df', None),
+    ('history', lambda: deque(maxlen=Config.MAX_HISTORY_ENTRIES)),
+    ('abort_extraction', False),
+)
 
 def initialize_session_state():
-    """Initialize session state variables."""
-    if 'extraction_results' not in st.session_state:
-        st.session_state.extraction_results = None
-    if 'analyzed_results' not in st.session_state:
-        st.session_state.analyzed_results = None
-    if 'analyzed_df' not in st.session_state:
-        st.session_state.analyzed_df = None
-    if 'history' not in st.session_state:
-        st.session_state.history = []
-    if 'abort_extraction' not in st.session_state:
-        st.session_state.abort_extraction = False
-
-def get_app_configuration() -> Dict[str, Any]:
+    """Initialize session state variables.
+
+    L'historique est une deque bornée à Config.MAX_HISTORY_ENTRIES : l'ajout
+    d'une entrée au-delà de la limite évince la plus ancienne en O(1).
+    """
+    for key, default in _DEFAULTS:
+        if key not in st.session_state:
+            st.session_state[key] = default() if callable(default) else default
+
+class AppConfig(TypedDict):
+    """Configuration globale saisie dans la barre latérale (clés de Config)."""
+    MAX_WORKERS: int
+    TIMEOUT: int
+    CHUNK_SIZE: int
+    TEST_SIZE: Optional[int]
+    TEST_MODE: bool
+
+# Curseurs de configuration : (clé Config, libellé, min, max, défaut, clé du widget)
+_SLIDER_SPECS = (
+    ("MAX_WORKERS", "Max workers", 1, 20, 10, "global_workers"),
+    ("TIMEOUT", "Timeout (seconds)", 1, 15, 5, "global_timeout"),
+    ("CHUNK_SIZE", "Batch size", 10, 100, 50, "global_chunk_size"),
+)
+_TEST_SIZE_HELP = "Limit the number of URLs to process for testing (used only in test mode)"
+
+# Un fragment ne relance que son propre code à l'interaction (Streamlit >= 1.33) ;
+# sur les versions antérieures, la fonction s'exécute telle quelle à chaque rerun
+_fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None) or (lambda func: func)
+
+def get_app_configuration() -> AppConfig:
     """Get application configuration from sidebar."""
+    # Le fragment doit être appelé depuis le conteneur de la barre latérale
     with st.sidebar:
-        with st.expander("⚙️ Configuration"):
-            config = {
-                "MAX_WORKERS": st.slider("Max workers", 1, 20, 10, 
-                                       key="global_workers"),
-                "TIMEOUT": st.slider("Timeout (seconds)", 1, 15, 5, 
-                                   key="global_timeout"),
-                "CHUNK_SIZE": st.slider("Batch size", 10, 100, 50, 
-                                      key="global_chunk_size")
+        _config_fragment()
+    return st.session_state['app_config']
+
+@_fragment
+def _config_fragment():
+    """Affiche les paramètres globaux et publie la configuration dans la session."""
+    # Formulaire : les valeurs ne sont transmises (et le script relancé) qu'au clic sur "Apply"
+    with st.expander("⚙️ Configuration"):
+        with st.form("global_config_form", clear_on_submit=False):
+            sliders = {
+                name: st.slider(label, low, high, default, key=key)
+                for name, label, low, high, default, key in _SLIDER_SPECS
             }
             
             st.markdown("---")
             test_mode = st.checkbox("🧪 Enable test mode", False, 
                                   key="global_test_mode")
-            if test_mode:
-                config["TEST_SIZE"] = st.number_input(
-                    "Number of URLs to test",
-                    min_value=1,
-                    max_value=1000,
-                    value=10,
-                    help="Limit the number of URLs to process for testing",
-                    key="global_test_size"
-                )
-            else:
-                config["TEST_SIZE"] = None
-                
-            config["TEST_MODE"] = test_mode
-            
-            return config
\ No newline at end of file
+            # Toujours affiché : dans un formulaire, la case à cocher ne relance pas le script
+            test_size = st.number_input(
+                "Number of URLs to test",
+                min_value=1,
+                max_value=1000,
+                value=10,
+                help=_TEST_SIZE_HELP,
+                key="global_test_size"
+            )
+            st.form_submit_button("Apply")
+
+    if not test_mode:
+        test_size = None
+
+    # Les widgets ne changent qu'à l'interaction : on conserve le dictionnaire du rerun précédent
+    signature = (*sliders.values(), test_mode, test_size)
+    if st.session_state.get('_app_config_sig') == signature:
+        return
+
+    st.session_state['_app_config_sig'] = signature
+    st.session_state['app_config'] = {
+        **sliders,
+        "TEST_SIZE": test_size,
+        "TEST_MODE": test_mode
+    }
@@ -1,24 +1,55 @@
 import streamlit as st
 import pandas as pd
-from ..analysis import IframeAnalyzer
+import numpy as np
+from ..analysis import IframeAnalyzer, load_template_dataframe
 from ..extractors import IframeExtractor
-from io import StringIO, BytesIO
+from io import BytesIO
 from typing import Dict, Optional, List
+import csv
 import logging
+import os
 import re
-import json
+import threading
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from ..config import Config
+from ..utils import read_csv_file
 
 # Initialisation du logger
 logger = logging.getLogger('analysis_tab')
 
+# Échappements HTML appliqués dans cet ordre (le '&' final ré-échappe les entités produites)
+HTML_ESCAPES = (('<', '&lt;'), ('>', '&gt;'), ('"', '&quot;'), ("'", '&#x27;'), ('&', '&amp;'))
+# Même résultat que HTML_ESCAPES appliqué dans l'ordre, mais en une seule passe par chaîne
+HTML_ESCAPE_TABLE = str.maketrans({
+    '<': '&amp;lt;', '>': '&amp;gt;', '"': '&amp;quot;', "'": '&amp;#x27;', '&': '&amp;'
+})
+MAX_CELL_LENGTH = 1000
+# Taille de l'échantillon lu pour détecter le séparateur des CSV
+CSV_SNIFF_SIZE = 64 * 1024
+# Part maximale de valeurs distinctes pour convertir une colonne importée en catégorie
+CATEGORY_MAX_RATIO = 0.5
+# Options xlsxwriter : pas de conversion automatique des URLs en liens (limitée à 65 530 par feuille)
+EXCEL_WRITER_KWARGS = {'options': {'strings_to_urls': False}}
+
+# xlsxwriter est optionnel : à défaut, l'export Excel passe par openpyxl
+try:
+    import xlsxwriter  # noqa: F401
+    HAS_XLSXWRITER = True
+except ImportError:
+    HAS_XLSXWRITER = False
+# Caractères déclenchant un échappement (les cellules sans aucun d'eux sont laissées intactes)
+SPECIAL_CHARS_PATTERN = r'[<>"\'&]'
+
 def sanitize_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     """Sanitize les données d'un DataFrame pour éviter les attaques XSS."""
     if df is None or df.empty:
         return df
     
+    # Déjà sanitizé (le marqueur suit les copies, sélections et renommages) : ne pas ré-échapper
+    if df.attrs.get('sanitized'):
+        return df
+    
     # Créer une copie du DataFrame pour éviter les SettingWithCopyWarning
     sanitized_df = df.copy()
       # Fonction pour sanitizer les chaînes individuelles
@@ -27,31 +58,104 @@ def sanitize_dataframe(df: pd.DataFrame) -> pd.DataFrame:
             return val
         if isinstance(val, str):
             # Échapper les caractères HTML dangereux
-            val = val.replace('<', '&lt;').replace('>', '&gt;')
-            val = val.replace('"', '&quot;').replace("'", '&#x27;')
-            val = val.replace('&', '&amp;')
+            val = val.translate(HTML_ESCAPE_TABLE)
             # Limiter la longueur des chaînes
-            if len(val) > 1000:
-                val = val[:1000] + "..."
+            if len(val) > MAX_CELL_LENGTH:
+                val = val[:MAX_CELL_LENGTH] + "..."
         return val
+
+    # Version vectorisée (noyaux Arrow) pour une colonne de chaînes : seules les cellules
+    # contenant un caractère à échapper ou trop longues sont réécrites, les autres sont conservées
+    def sanitize_strings(values: pd.Series, strings: pd.Series) -> pd.Series:
+        flagged = (
+            strings.str.contains(SPECIAL_CHARS_PATTERN, regex=True)
+            | (strings.str.len() > MAX_CELL_LENGTH)
+        ).fillna(False).to_numpy(dtype=bool)
+        if not flagged.any():
+            return values
+        escaped = strings[flagged]
+        for char, entity in HTML_ESCAPES:
+            escaped = escaped.str.replace(char, entity, regex=False)
+        too_long = (escaped.str.len() > MAX_CELL_LENGTH).fillna(False)
+        if too_long.any():
+            escaped = escaped.mask(too_long, escaped.str.slice(0, MAX_CELL_LENGTH) + "...")
+        values = values.copy()
+        values[flagged] = escaped.to_numpy(dtype=object)
+        return values
     
     # Appliquer la sanitization à toutes les colonnes textuelles
     for col in sanitized_df.columns:
         if sanitized_df[col].dtype == 'object':
-            sanitized_df.loc[:, col] = sanitized_df[col].apply(sanitize_value)
+            values = sanitized_df[col]
+            if pd.api.types.infer_dtype(values, skipna=True) == 'string':
+                # Colonne purement textuelle : calcul sur une vue Arrow, les valeurs manquantes
+                # d'origine (None/NaN) n'étant jamais réécrites
+                sanitized_df[col] = sanitize_strings(values, values.astype('string[pyarrow]'))
+            else:
+                # Colonnes mixtes : seules les chaînes passent par le noyau vectorisé,
+                # les autres valeurs sont conservées telles quelles
+                is_string = np.fromiter(
+                    (isinstance(val, str) for val in values.to_numpy()), dtype=bool, count=len(values)
+                )
+                if not is_string.any():
+                    continue
+                strings = values[is_string]
+                values = values.copy()
+                values[is_string] = sanitize_strings(strings, strings.astype('string[pyarrow]')).to_numpy()
+                sanitized_df[col] = values
+        elif isinstance(sanitized_df[col].dtype, pd.CategoricalDtype):
+            # Colonnes catégorielles : chaque catégorie n'est sanitizée qu'une fois
+            sanitized_df[col] = sanitized_df[col].map(sanitize_value)
+        elif isinstance(sanitized_df[col].dtype, pd.StringDtype):
+            # Colonnes de chaînes (Arrow) : noyaux de calcul vectorisés, les <NA> sont conservés
+            sanitized_df[col] = sanitize_strings(sanitized_df[col], sanitized_df[col])
     
+    sanitized_df.attrs['sanitized'] = True
     return sanitized_df
 
+@st.cache_data(show_spinner=False, max_entries=4)
+def dataframe_to_csv(df: pd.DataFrame) -> bytes:
+    """Sérialise un DataFrame en CSV (mémoïsé : inutile de le refaire à chaque rerun)."""
+    output = BytesIO()
+    df.to_csv(output, index=False)
+    return output.getvalue()
+
+def write_excel_workbook(sheets: List[tuple], output: BytesIO) -> None:
+    """Écrit les feuilles (nom, DataFrame) dans un classeur Excel."""
+    if HAS_XLSXWRITER:
+        with pd.ExcelWriter(output, engine='xlsxwriter', engine_kwargs=EXCEL_WRITER_KWARGS) as writer:
+            for sheet_name, sheet_df in sheets:
+                sheet_df.to_excel(writer, sheet_name=sheet_name, index=False)
+        return
+    
+    # Repli openpyxl en mode write_only : les lignes sont écrites au fil de l'eau
+    # au lieu de construire tout le classeur en mémoire
+    from openpyxl import Workbook, LXML
+    if not LXML:
+        logger.warning("lxml not installed: openpyxl write_only export will use more memory")
+    
+    workbook = Workbook(write_only=True)
+    for sheet_name, sheet_df in sheets:
+        worksheet = workbook.create_sheet(title=sheet_name)
+        worksheet.append([str(col) for col in sheet_df.columns])
+        # Cellules manquantes laissées vides, comme avec to_excel
+        values = sheet_df.astype(object).where(sheet_df.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            worksheet.append(row)
+    workbook.save(output)
+
 def validate_file_content(file) -> bool:
     """Valide le contenu d'un fichier téléchargé."""
     try:
-        # Vérifier la taille du fichier
-        file_content = file.read()
-        file.seek(0)  # Remettre le curseur au début
-        
         # Limiter la taille du fichier (10 MB)
         max_size = 10 * 1024 * 1024  # 10 MB
-        if len(file_content) > max_size:
+        
+        # Mesurer la taille sans charger le contenu en mémoire
+        file.seek(0, os.SEEK_END)
+        file_size = file.tell()
+        file.seek(0)  # Remettre le curseur au début
+        
+        if file_size > max_size:
             st.error(f"File size exceeds the limit of 10 MB")
             return False
         
@@ -69,6 +173,19 @@ def validate_file_content(file) -> bool:
         logger.error(f"Error validating file content: {str(e)}")
         return False
 
+def detect_csv_separator(file) -> Optional[str]:
+    """Devine le séparateur (';' ou ',') d'un CSV à partir de ses premières lignes."""
+    head = file.read(CSV_SNIFF_SIZE)
+    file.seek(0)
+    sample = head.decode('utf-8', errors='replace')
+    if len(head) == CSV_SNIFF_SIZE:
+        # Ignorer la dernière ligne, probablement tronquée par l'échantillonnage
+        sample = sample.rsplit('\n', 1)[0]
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=';,').delimiter
+    except csv.Error:
+        return None
+
 def load_data_file(file):
     """Charge un fichier Excel ou CSV de façon sécurisée"""
     if not validate_file_content(file):
@@ -77,13 +194,18 @@ def load_data_file(file):
     try:
         # Chargement du fichier avec détection du séparateur
         if file.name.endswith('.csv'):
-            # Essayer d'abord avec le séparateur point-virgule
-            try:
-                data = pd.read_csv(file, sep=';', encoding='utf-8')
-            except:
-                # Si ça échoue, essayer avec la virgule
-                file.seek(0)  # Remettre le curseur au début du fichier
-                data = pd.read_csv(file, sep=',', encoding='utf-8')
+            separator = detect_csv_separator(file)
+            if separator:
+                # Séparateur identifié sur l'échantillon : une seule lecture du fichier
+                data = read_csv_file(file, separator)
+            else:
+                # Essayer d'abord avec le séparateur point-virgule
+                try:
+                    data = read_csv_file(file, ';')
+                except:
+                    # Si ça échoue, essayer avec la virgule
+                    file.seek(0)  # Remettre le curseur au début du fichier
+                    data = read_csv_file(file, ',')
         else:
             # Pour les fichiers Excel, limiter les feuilles et colonnes
             data = pd.read_excel(file, engine='openpyxl', sheet_name=0)
@@ -103,6 +225,15 @@ def load_data_file(file):
             st.warning(f"⚠️ File has more than {max_rows} rows. Only the first {max_rows} rows will be processed.")
             data = data.head(max_rows)
                 
+        # Colonnes textuelles très répétitives (templates, clusters, codes...) en catégories :
+        # moins de mémoire, et unique/isin/sanitization ne portent que sur les catégories
+        for col in data.columns:
+            values = data[col]
+            if (values.dtype == 'object'
+                    and pd.api.types.infer_dtype(values, skipna=True) == 'string'
+                    and values.nunique(dropna=True) < len(data) * CATEGORY_MAX_RATIO):
+                data[col] = values.astype('category')
+        
         # Sanitize les données
         data = sanitize_dataframe(data)
         
@@ -122,23 +253,21 @@ def find_missing_forms(extraction_results, url_mapping_data, url_column, id_colu
         if extraction_results is None or url_mapping_data is None:
             return None
             
-        # Créer un DataFrame à partir des résultats d'extraction
-        extracted_df = pd.DataFrame(extraction_results)
+        # URLs sources des résultats d'extraction, lues directement dans les dictionnaires
+        extracted_urls = {result['URL source'] for result in extraction_results if 'URL source' in result}
         
         # Si le mapping ou l'extraction n'ont pas les colonnes nécessaires
-        if url_column not in url_mapping_data.columns or 'URL source' not in extracted_df.columns:
+        if url_column not in url_mapping_data.columns or not extracted_urls:
             return None
             
-        # Récupérer toutes les URLs du mapping et de l'extraction
-        mapping_urls = set(url_mapping_data[url_column].dropna().tolist())
-        extracted_urls = set(extracted_df['URL source'].dropna().tolist())
-        
-        # Trouver les URLs présentes dans le mapping mais pas dans l'extraction
-        missing_urls = mapping_urls - extracted_urls
+        # Trouver les URLs présentes dans le mapping mais pas dans l'extraction (index haché)
+        mapping_urls = url_mapping_data[url_column]
+        extracted_urls = pd.Index(list(extracted_urls)).dropna()
+        is_missing = mapping_urls.notna() & ~mapping_urls.isin(extracted_urls)
         
         # Créer un DataFrame des formulaires manquants
-        if missing_urls:
-            missing_forms = url_mapping_data[url_mapping_data[url_column].isin(missing_urls)].copy()
+        if is_missing.any():
+            missing_forms = url_mapping_data[is_missing].copy()
             missing_forms['Status'] = 'Missing in extraction'
             return missing_forms
             
@@ -147,11 +276,14 @@ def find_missing_forms(extraction_results, url_mapping_data, url_column, id_colu
         logger.error(f"Error finding missing forms: {str(e)}")
         return None
 
-def process_missing_url(url, extractor):
+def process_missing_url(url, extractor, abort_event: Optional[threading.Event] = None):
     """
     Traite une URL manquante pour détecter les formulaires.
     Retourne les résultats ou None si aucun formulaire n'est trouvé.
     """
+    # Arrêt demandé : ne pas lancer de nouvelle requête
+    if abort_event is not None and abort_event.is_set():
+        return None
     try:
         results = extractor.extract_from_url(url)
         if results:
@@ -189,19 +321,21 @@ def check_missing_urls(missing_urls: List[str], progress_bar=None) -> List[Dict]
         st.warning("⚠️ Check missing URLs aborted by user!")
         return results
     
+    progress_step = max(1, len(missing_urls) // 100)
+    abort_event = threading.Event()
+    
     with ThreadPoolExecutor(max_workers=Config.MAX_WORKERS) as executor:
         future_to_url = {
-            executor.submit(process_missing_url, url, extractor): url
+            executor.submit(process_missing_url, url, extractor, abort_event): url
             for url in missing_urls
         }
         
         for future in as_completed(future_to_url):
             # Vérifier si le processus doit être interrompu
             if st.session_state.abort_extraction:
-                # Annuler les futures en attente
-                for f in future_to_url:
-                    if not f.done():
-                        f.cancel()
+                # Les tâches en file sont abandonnées, celles en cours s'arrêtent d'elles-mêmes
+                abort_event.set()
+                executor.shutdown(wait=False, cancel_futures=True)
                 if progress_bar:
                     progress_bar.progress(1.0)
                 st.warning("⚠️ Check missing URLs aborted by user!")
@@ -211,7 +345,8 @@ def check_missing_urls(missing_urls: List[str], progress_bar=None) -> List[Dict]
             if url_results:
                 results.extend(url_results)
             completed_urls += 1
-            if progress_bar:
+            # Limiter les rafraîchissements de la barre (~100 max)
+            if progress_bar and (completed_urls % progress_step == 0 or completed_urls == len(missing_urls)):
                 progress_bar.progress(completed_urls / len(missing_urls))
     
     return results
@@ -304,9 +439,9 @@ def display_missing_forms(allow_check=True):
                         
                         # Mettre à jour les résultats d'extraction
                         if 'extraction_results' in st.session_state and st.session_state.extraction_results:
-                            # Ajouter les nouveaux résultats aux résultats existants
-                            all_results = st.session_state.extraction_results + recovered_results
-                            st.session_state.extraction_results = all_results
+                            # Ajouter les nouveaux résultats aux résultats existants (en place, sans recopie)
+                            all_results = st.session_state.extraction_results
+                            all_results.extend(recovered_results)
                             
                             # Mettre à jour l'analyse
                             if ('url_mapping_data' in st.session_state and 
@@ -350,11 +485,9 @@ def display_missing_forms(allow_check=True):
     col1, _ = st.columns([1, 3])
     with col1:
         # Export des formulaires manquants
-        output = BytesIO()
-        missing_forms.to_csv(output, index=False)
         st.download_button(
             "📥 Download missing forms (CSV)",
-            output.getvalue(),
+            dataframe_to_csv(missing_forms),
             "missing_forms.csv",
             "text/csv"
         )
@@ -389,10 +522,12 @@ def display_summary(df):
         st.metric("Total forms", total_forms)
     with col2:
         st.metric("Unique forms", total_unique)
+    # Un seul masque pour les deux compteurs CRM
+    with_crm = int(df['CRM Campaign'].notna().sum())
     with col3:
-        st.metric("With CRM code", df['CRM Campaign'].notna().sum())
+        st.metric("With CRM code", with_crm)
     with col4:
-        st.metric("Without CRM code", df['CRM Campaign'].isna().sum())
+        st.metric("Without CRM code", total_forms - with_crm)
     
     # Afficher le compteur des formulaires récupérés si présents
     if recovered_forms > 0:
@@ -402,6 +537,8 @@ def display_summary(df):
     core_columns = ['URL source', 'Iframe', 'Form ID', 'CRM Campaign', 'Template', 'Cluster', 'Recovery Status']
     url_columns = [col for col in df.columns if col not in core_columns and not col.startswith('CRM_')]
     crm_columns = [col for col in df.columns if col.startswith('CRM_')]
+    # Taux de remplissage de toutes les colonnes importées en une seule réduction
+    filled_counts = df[url_columns + crm_columns].notna().sum()
     
     # Afficher les colonnes du mapping URL
     if url_columns:
@@ -410,7 +547,7 @@ def display_summary(df):
         
         for idx, col_name in enumerate(url_columns):
             with metrics_cols[idx % 4]:
-                filled_values = df[col_name].notna().sum()
+                filled_values = filled_counts[col_name]
                 st.metric(
                     f"{col_name}",
                     f"{filled_values}/{total_forms}",
@@ -424,7 +561,7 @@ def display_summary(df):
         
         for idx, col_name in enumerate(crm_columns):
             with metrics_cols[idx % 4]:
-                filled_values = df[col_name].notna().sum()
+                filled_values = filled_counts[col_name]
                 display_name = col_name.replace('CRM_', '')
                 st.metric(
                     f"{display_name}",
@@ -444,7 +581,7 @@ def display_alerts(df):
     
     # Vérifier uniquement les mauvaises intégrations
     try:
-        bad_integration = df[df['Iframe'].str.contains("survey.dll", na=False)]
+        bad_integration = df[df['Iframe'].str.contains("survey.dll", na=False, regex=False)]
         if not bad_integration.empty:
             alerts.append({
                 "severity": "error",
@@ -490,6 +627,16 @@ def display_alerts(df):
     else:
         st.success("✅ No anomalies detected")
 
+def distinct_values(values: pd.Series) -> np.ndarray:
+    """Valeurs distinctes non manquantes d'une colonne, dans leur ordre d'apparition."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Colonne catégorielle : dédoublonnage sur les codes entiers, puis lecture des catégories
+        codes = values.cat.codes.to_numpy()
+        present = pd.unique(codes[codes >= 0])
+        return np.asarray(values.cat.categories.take(present))
+    # unique() renvoie un ExtensionArray pour les colonnes nullables (string[pyarrow], Int64...)
+    return np.asarray(values.dropna().unique())
+
 def display_details(df):
     """Affiche les détails des données"""
     if df is None or df.empty:
@@ -505,14 +652,14 @@ def display_details(df):
     with col1:
         template_filter = st.multiselect(
             "Filter by Template",
-            options=df['Template'].dropna().unique() if 'Template' in df.columns else []
+            options=distinct_values(df['Template']) if 'Template' in df.columns else []
         )
     
     with col2:
         # Filtre pour Cluster s'il existe
         cluster_filter = []
         if 'Cluster' in df.columns:
-            unique_clusters = df['Cluster'].dropna().unique()
+            unique_clusters = distinct_values(df['Cluster'])
             if len(unique_clusters) > 0:
                 cluster_filter = st.multiselect(
                     "Filter by Cluster",
@@ -524,7 +671,7 @@ def display_details(df):
         crm_filter = "All"  # Valeur par défaut
         crm_campaign_filter = []
         
-        crm_unique_values = df['CRM Campaign'].dropna().unique()
+        crm_unique_values = distinct_values(df['CRM Campaign'])
         if len(crm_unique_values) > 0:
             if len(crm_unique_values) <= 15:  # Limiter si trop de valeurs
                 crm_campaign_filter = st.multiselect(
@@ -560,7 +707,7 @@ def display_details(df):
         for idx, col_name in enumerate(url_columns):
             with filter_columns[idx % 3]:
                 # Obtenir les valeurs uniques en excluant les NaN
-                unique_values = df[col_name].dropna().unique()
+                unique_values = distinct_values(df[col_name])
                 if len(unique_values) > 0 and len(unique_values) <= 10:
                     url_filters[col_name] = st.multiselect(
                         f"Filter by {col_name}",
@@ -578,7 +725,7 @@ def display_details(df):
         for idx, col_name in enumerate(crm_columns):
             with filter_columns[idx % 3]:
                 display_name = col_name.replace('CRM_', '')
-                unique_values = df[col_name].dropna().unique()
+                unique_values = distinct_values(df[col_name])
                 if len(unique_values) > 0 and len(unique_values) <= 10:
                     crm_filters[col_name] = st.multiselect(
                         f"Filter by {display_name}",
@@ -586,50 +733,56 @@ def display_details(df):
                     )
 
     try:
-        # Applique tous les filtres
-        filtered_df = df.copy()
+        # Applique tous les filtres : un seul masque booléen, une seule sélection à la fin
+        mask = np.ones(len(df), dtype=bool)
+        
+        def keep(condition: pd.Series):
+            # Les valeurs manquantes d'un masque nullable ne sont pas retenues
+            nonlocal mask
+            mask &= condition.to_numpy(dtype=bool, na_value=False)
         
         # Filtre par Template
         if template_filter:
-            filtered_df = filtered_df[filtered_df['Template'].isin(template_filter)]
+            keep(df['Template'].isin(template_filter))
         
         # Filtre par Cluster
         if cluster_filter:
-            filtered_df = filtered_df[filtered_df['Cluster'].isin(cluster_filter)]
+            keep(df['Cluster'].isin(cluster_filter))
         
         # Filtre par CRM Campaign
         if crm_campaign_filter:
-            filtered_df = filtered_df[filtered_df['CRM Campaign'].isin(crm_campaign_filter)]
+            keep(df['CRM Campaign'].isin(crm_campaign_filter))
         elif crm_filter != "All":
             if crm_filter == "With CRM":
-                filtered_df = filtered_df[filtered_df['CRM Campaign'].notna()]
+                keep(df['CRM Campaign'].notna())
             elif crm_filter == "Without CRM":
-                filtered_df = filtered_df[filtered_df['CRM Campaign'].isna()]
+                keep(df['CRM Campaign'].isna())
         
         # Filtre par statut de récupération
-        if recovery_filter != "All" and 'Recovery Status' in filtered_df.columns:
+        if recovery_filter != "All" and 'Recovery Status' in df.columns:
             if recovery_filter == "Only recovered forms":
-                filtered_df = filtered_df[filtered_df['Recovery Status'] == 'Recovered']
+                keep(df['Recovery Status'] == 'Recovered')
             elif recovery_filter == "Only original forms":
-                filtered_df = filtered_df[filtered_df['Recovery Status'].isna()]
+                keep(df['Recovery Status'].isna())
         
         # Filtres URL mapping
         for col_name, filter_values in url_filters.items():
             if filter_values:
-                filtered_df = filtered_df[filtered_df[col_name].isin(filter_values)]
+                keep(df[col_name].isin(filter_values))
         
         # Filtres CRM
         for col_name, filter_values in crm_filters.items():
             if filter_values:
-                filtered_df = filtered_df[filtered_df[col_name].isin(filter_values)]
+                keep(df[col_name].isin(filter_values))
+        
+        filtered_df = df if mask.all() else df[mask]
         
         st.metric("Filtered results", len(filtered_df))
         
         # Préparer l'affichage en renommant les colonnes CRM pour plus de clarté
-        display_df = filtered_df.copy()
-        for col in display_df.columns:
-            if col.startswith('CRM_'):
-                display_df = display_df.rename(columns={col: col.replace('CRM_', '')})
+        display_df = filtered_df.rename(columns={
+            col: col.replace('CRM_', '') for col in filtered_df.columns if col.startswith('CRM_')
+        })
         
         # Sanitize les données avant affichage
         display_df = sanitize_dataframe(display_df)
@@ -729,15 +882,15 @@ def display_export(df):
     with col1:
         try:
             # Préparer le DataFrame pour l'export
-            export_df = df.copy()
+            # Pas de copie : le renommage et la sanitization produisent de nouveaux DataFrames
+            export_df = df
             if rename_crm_cols:
-                renamed_columns = {}
-                for col in export_df.columns:
-                    if col.startswith('CRM_'):
-                        renamed_columns[col] = col.replace('CRM_', '')
-                
-                if renamed_columns:
-                    export_df = export_df.rename(columns=renamed_columns)
+                # Retrait du préfixe en une opération sur l'index des colonnes ; set_axis
+                # renvoie un nouveau DataFrame sans toucher à celui de la session
+                export_df = export_df.set_axis(
+                    export_df.columns.astype(str).str.replace(r'^CRM_', '', regex=True),
+                    axis=1, copy=False
+                )
             
             # Sanitize les données avant export
             export_df = sanitize_dataframe(export_df)
@@ -747,11 +900,9 @@ def display_export(df):
             filename = f"{custom_filename}_{timestamp}"
             
             if export_format == "CSV":
-                output = StringIO()
-                export_df.to_csv(output, index=False)
                 st.download_button(
                     "📥 Download analysis (CSV)",
-                    output.getvalue(),
+                    dataframe_to_csv(export_df),
                     f"{filename}.csv",
                     "text/csv"
                 )
@@ -760,49 +911,41 @@ def display_export(df):
                 output = BytesIO()
                 
                 try:
-                    # Créer un writer Excel avec le moteur openpyxl
-                    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                        # Feuille 1: Résultats de l'analyse
-                        export_df.to_excel(writer, sheet_name="Analysis Results", index=False)
-                        
-                        # Feuille 2: Formulaires manquants (si disponibles)
-                        if excel_options.get("include_missing_forms", False) and missing_forms is not None and not missing_forms.empty:
-                            missing_forms_df = missing_forms.copy()
-                            missing_forms_df.to_excel(writer, sheet_name="Missing Forms", index=False)
-                        
-                        # Feuille 3: Données de mapping URL (si disponibles)
-                        if excel_options.get("include_mapped_data", False) and url_mapping_data is not None:
-                            url_mapping_df = url_mapping_data.copy()
-                            url_mapping_df.to_excel(writer, sheet_name="URL Mapping Data", index=False)
-                        
-                        # Feuille 4: Données CRM (si disponibles)
-                        if excel_options.get("include_crm_data", False) and crm_data is not None:
-                            crm_df = crm_data.copy()
-                            crm_df.to_excel(writer, sheet_name="CRM Campaign Data", index=False)                        # Feuille 5: Données des templates Selligent
-                        if excel_options.get("include_template_data", False):
-                            try:
-                                # Charger les données de template depuis le fichier JSON
-                                from ..utils import get_data_file_path
-                                json_path = get_data_file_path("template_mapping.json")
-                                with open(json_path, "r") as f:
-                                    template_data = json.load(f)
-                                    
-                                # Convertir en DataFrame
-                                template_df = pd.DataFrame([
-                                    {"Form ID": form_id, "Template Name": template_name}
-                                    for form_id, template_name in template_data.items()
-                                ])
-                                
-                                template_df.to_excel(writer, sheet_name="Template Data", index=False)
-                            except Exception as e:
-                                st.warning(f"Could not include template data: {str(e)}")
-                                logger.error(f"Error adding template data to Excel: {str(e)}")
-                        
-                        # Feuille 6: Résumé des formulaires récupérés (si disponibles et activés)
-                        if excel_options.get("include_recovered_summary", False) and 'recovered_forms' in st.session_state and st.session_state.recovered_forms:
-                            # Créer un DataFrame à partir des formulaires récupérés
-                            recovered_df = pd.DataFrame(st.session_state.recovered_forms)
-                            recovered_df.to_excel(writer, sheet_name="Recovered Forms", index=False)
+                    # Feuilles à écrire, dans l'ordre du classeur (l'écriture ne modifie pas
+                    # les DataFrames : inutile de les copier)
+                    # Feuille 1: Résultats de l'analyse
+                    sheets = [("Analysis Results", export_df)]
+                    
+                    # Feuille 2: Formulaires manquants (si disponibles)
+                    if excel_options.get("include_missing_forms", False) and missing_forms is not None and not missing_forms.empty:
+                        sheets.append(("Missing Forms", missing_forms))
+                    
+                    # Feuille 3: Données de mapping URL (si disponibles)
+                    if excel_options.get("include_mapped_data", False) and url_mapping_data is not None:
+                        sheets.append(("URL Mapping Data", url_mapping_data))
+                    
+                    # Feuille 4: Données CRM (si disponibles)
+                    if excel_options.get("include_crm_data", False) and crm_data is not None:
+                        sheets.append(("CRM Campaign Data", crm_data))
+                    
+                    # Feuille 5: Données des templates Selligent
+                    if excel_options.get("include_template_data", False):
+                        try:
+                            # Données de template (fichier JSON lu une seule fois par processus)
+                            sheets.append(("Template Data", load_template_dataframe()))
+                        except Exception as e:
+                            st.warning(f"Could not include template data: {str(e)}")
+                            logger.error(f"Error adding template data to Excel: {str(e)}")
+                    
+                    # Feuille 6: Résumé des formulaires récupérés (si disponibles et activés)
+                    if excel_options.get("include_recovered_summary", False) and 'recovered_forms' in st.session_state and st.session_state.recovered_forms:
+                        # Créer un DataFrame à partir des formulaires récupérés
+                        recovered_df = pd.DataFrame(st.session_state.recovered_forms)
+                        sheets.append(("Recovered Forms", recovered_df))
+                    
+                    # xlsxwriter si disponible, sinon openpyxl en écriture continue ;
+                    # les URLs restent du texte brut dans les deux cas
+                    write_excel_workbook(sheets, output)
                     
                     # Faire remonter le buffer au début
                     output.seek(0)
@@ -819,11 +962,9 @@ def display_export(df):
                     
                     # Fallback to CSV if Excel export fails
                     st.warning("Falling back to CSV export due to Excel error.")
-                    output_csv = StringIO()
-                    export_df.to_csv(output_csv, index=False)
                     st.download_button(
                         "📥 Download analysis (CSV fallback)",
-                        output_csv.getvalue(),
+                        dataframe_to_csv(export_df),
                         f"{filename}.csv",
                         "text/csv"
                     )
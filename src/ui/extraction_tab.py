@@ -23,6 +23,8 @@ def process_urls_batch(urls, progress_bar):
         st.warning("⚠️ Extraction aborted by user!")
         return []
 
+    progress_step = max(1, len(urls) // 100)
+
     with ThreadPoolExecutor(max_workers=Config.MAX_WORKERS) as executor:
         future_to_url = {
             executor.submit(extractor.extract_from_url, url): url
@@ -32,10 +34,8 @@ def process_urls_batch(urls, progress_bar):
         for future in as_completed(future_to_url):
             # Vérifier si l'extraction doit être interrompue
             if st.session_state.abort_extraction:
-                # Annuler les futures en attente
-                for f in future_to_url:
-                    if not f.done():
-                        f.cancel()
+                # Abandonner d'un coup toutes les URLs encore en file
+                executor.shutdown(wait=False, cancel_futures=True)
                 st.warning("⚠️ Extraction aborted by user!")
                 break
             
@@ -43,7 +43,9 @@ def process_urls_batch(urls, progress_bar):
             if url_results:
                 results.extend(url_results)
             completed_urls += 1
-            progress_bar.progress(completed_urls / len(urls))
+            # Limiter les rafraîchissements de la barre (~100 max par lot)
+            if completed_urls % progress_step == 0 or completed_urls == len(urls):
+                progress_bar.progress(completed_urls / len(urls))
 
     return results
 
@@ -259,24 +261,33 @@ def display():
                 progress_sitemap = st.progress(0)
 
                 sitemap_extractor = SitemapExtractor()
-                for idx, sitemap_url in enumerate(urls):
-                    # Vérifier si l'extraction doit être interrompue
-                    if st.session_state.abort_extraction:
-                        progress_sitemap.progress(1.0)
-                        st.warning("⚠️ Sitemap extraction aborted by user!")
-                        return
-                    
-                    status_sitemap.write(f"📑 Reading sitemap: {sanitize_html(sitemap_url)}")
-                    sitemap_urls = sitemap_extractor.extract_urls(sitemap_url)
-                    # Valider les URLs extraites du sitemap
-                    sitemap_urls = sanitize_urls(sitemap_urls)
-                    
-                    # MODIFICATION: Ajouter uniquement les URLs non-dupliquées
-                    for url in sitemap_urls:
-                        if url not in processed_urls:
-                            processed_urls.append(url)
-                    
-                    progress_sitemap.progress((idx + 1) / len(urls))
+                status_sitemap.write(f"📑 Reading {len(urls)} sitemap(s)...")
+
+                # Les sitemaps sont téléchargés en parallèle (session et pool de connexions partagés),
+                # les résultats sont consommés dans l'ordre de saisie
+                with ThreadPoolExecutor(max_workers=Config.MAX_WORKERS) as executor:
+                    futures = [executor.submit(sitemap_extractor.extract_urls, sitemap_url) for sitemap_url in urls]
+
+                    for idx, (sitemap_url, future) in enumerate(zip(urls, futures)):
+                        # Vérifier si l'extraction doit être interrompue
+                        if st.session_state.abort_extraction:
+                            for f in futures:
+                                f.cancel()
+                            progress_sitemap.progress(1.0)
+                            st.warning("⚠️ Sitemap extraction aborted by user!")
+                            return
+
+                        status_sitemap.write(f"📑 Reading sitemap: {sanitize_html(sitemap_url)}")
+                        sitemap_urls = future.result()
+                        # Valider les URLs extraites du sitemap
+                        sitemap_urls = sanitize_urls(sitemap_urls)
+
+                        # MODIFICATION: Ajouter uniquement les URLs non-dupliquées
+                        for url in sitemap_urls:
+                            if url not in processed_urls:
+                                processed_urls.append(url)
+
+                        progress_sitemap.progress((idx + 1) / len(urls))
 
                 if processed_urls and not st.session_state.abort_extraction:
                     st.success(f"✅ {len(processed_urls)} unique URLs extracted from sitemaps")
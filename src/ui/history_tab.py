@@ -1,11 +1,13 @@
 import streamlit as st
 import pandas as pd
-from io import StringIO, BytesIO
+from io import BytesIO
 import time
 import logging
 import re
-import json
+from collections import Counter, deque
 from datetime import datetime
+from ..config import Config
+from ..analysis import load_template_dataframe
 from ..utils import sanitize_html
 
 # Configuration du logger
@@ -34,27 +36,22 @@ def save_to_history(results, input_urls, parameters, execution_time):
             logger.error("Invalid data format for history entry")
             return
             
-        # Limiter le nombre d'entrées d'historique pour éviter les problèmes de mémoire
-        max_history_entries = 100
-        if 'history' in st.session_state and len(st.session_state.history) >= max_history_entries:
-            # Supprimer l'entrée la plus ancienne
-            st.session_state.history.pop(0)
-            
         # Sanitize les données avant stockage
         sanitized_results = sanitize_history_data(results)
         sanitized_urls = sanitize_history_data(input_urls)
         
-        # Compter les formulaires récupérés
-        recovered_forms = [r for r in results if r.get('Recovery Status') == 'Recovered']
-        original_forms = [r for r in results if r.get('Recovery Status') != 'Recovered']
+        # Compter les formulaires récupérés (une seule passe sur les résultats)
+        status_counts = Counter(r.get('Recovery Status') for r in results)
+        nb_recovered_forms = status_counts['Recovered']
+        nb_original_forms = len(results) - nb_recovered_forms
         
         history_entry = {
             "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
             "input_urls": sanitized_urls,
             "nb_input_urls": len(input_urls),
             "nb_iframes_found": len(results),
-            "nb_recovered_forms": len(recovered_forms),
-            "nb_original_forms": len(original_forms),
+            "nb_recovered_forms": nb_recovered_forms,
+            "nb_original_forms": nb_original_forms,
             "results": sanitized_results,
             "parameters": parameters,
             "execution_time": execution_time
@@ -69,12 +66,12 @@ def save_to_history(results, input_urls, parameters, execution_time):
         if 'recovered_forms' in st.session_state and st.session_state.recovered_forms:
             history_entry["recovered_forms"] = st.session_state.recovered_forms
         
-        # Vérifier si l'historique existe déjà
+        # Vérifier si l'historique existe déjà ; la deque bornée évince l'entrée la plus ancienne
         if 'history' not in st.session_state:
-            st.session_state.history = []
+            st.session_state.history = deque(maxlen=Config.MAX_HISTORY_ENTRIES)
             
         st.session_state.history.append(history_entry)
-        logger.info(f"Added history entry with {len(results)} results ({len(recovered_forms)} recovered)")
+        logger.info(f"Added history entry with {len(results)} results ({nb_recovered_forms} recovered)")
     except Exception as e:
         logger.error(f"Error saving to history: {str(e)}")
 
@@ -103,27 +100,16 @@ def export_with_sheets(results, timestamp, missing_forms=None, recovered_forms=N
                 
                 # Feuille 2: Formulaires manquants (si disponibles)
                 if missing_forms and len(missing_forms) > 0:
-                    missing_df = pd.DataFrame(missing_forms).copy()
+                    missing_df = pd.DataFrame(missing_forms)
                     missing_df.to_excel(writer, sheet_name="Missing Forms", index=False)
                 
                 # Feuille 3: Formulaires récupérés (si disponibles)
                 if recovered_forms and len(recovered_forms) > 0:
-                    recovered_df = pd.DataFrame(recovered_forms).copy()
+                    recovered_df = pd.DataFrame(recovered_forms)
                     recovered_df.to_excel(writer, sheet_name="Recovered Forms", index=False)                # Feuille 4: Données des templates Selligent
                 try:
-                    # Charger les données de template depuis le fichier JSON
-                    from ..utils import get_data_file_path
-                    json_path = get_data_file_path("template_mapping.json")
-                    with open(json_path, "r") as f:
-                        template_data = json.load(f)
-                        
-                    # Convertir en DataFrame
-                    template_df = pd.DataFrame([
-                        {"Form ID": form_id, "Template Name": template_name}
-                        for form_id, template_name in template_data.items()
-                    ])
-                    
-                    template_df.to_excel(writer, sheet_name="Template Data", index=False)
+                    # Données de template (fichier JSON lu une seule fois par processus)
+                    load_template_dataframe().to_excel(writer, sheet_name="Template Data", index=False)
                 except Exception as e:
                     logger.error(f"Could not include template data: {str(e)}")
             
@@ -141,11 +127,11 @@ def export_with_sheets(results, timestamp, missing_forms=None, recovered_forms=N
                     export_df.to_excel(writer, sheet_name="Extraction Results", index=False)
                     
                     if missing_forms and len(missing_forms) > 0:
-                        missing_df = pd.DataFrame(missing_forms).copy()
+                        missing_df = pd.DataFrame(missing_forms)
                         missing_df.to_excel(writer, sheet_name="Missing Forms", index=False)
                     
                     if recovered_forms and len(recovered_forms) > 0:
-                        recovered_df = pd.DataFrame(recovered_forms).copy()
+                        recovered_df = pd.DataFrame(recovered_forms)
                         recovered_df.to_excel(writer, sheet_name="Recovered Forms", index=False)
                         
                 output.seek(0)
@@ -210,7 +196,8 @@ def display_history_entry(entry, idx):
             if st.button("Reload this extraction", key=f"reload_{idx}"):
                 # Validation avant chargement
                 if isinstance(entry["results"], list) and all(isinstance(item, dict) for item in entry["results"]):
-                    st.session_state.extraction_results = entry["results"]
+                    # Copie de la liste : les résultats de session sont complétés en place
+                    st.session_state.extraction_results = list(entry["results"])
                     
                     # Recharger aussi les formulaires manquants s'ils existent
                     if "missing_forms" in entry and entry["missing_forms"]:
@@ -240,12 +227,11 @@ def display_history_entry(entry, idx):
             if "results" in entry and isinstance(entry["results"], list) and len(entry["results"]) > 0:
                 try:
                     if export_format == "CSV":
-                        output = StringIO()
+                        # Octets UTF-8 passés directement, sans tampon texte intermédiaire
                         df = pd.DataFrame(entry["results"])
-                        df.to_csv(output, index=False)
                         st.download_button(
                             "📥 Download results (CSV)",
-                            output.getvalue(),
+                            df.to_csv(index=False).encode('utf-8'),
                             f"extraction_results_{entry['timestamp'].replace(' ', '_').replace(':', '-')}.csv",
                             "text/csv",
                             key=f"download_csv_{idx}"
@@ -9,24 +9,29 @@ from datetime import datetime
 # Configuration du logger
 logger = logging.getLogger('share_tab')
 
+# Motifs de nettoyage des emails, compilés une seule fois
+HTML_TAG_PATTERN = re.compile(r'<[^>]*>')
+JAVASCRIPT_PATTERN = re.compile(r'javascript:', re.IGNORECASE)
+EVENT_HANDLER_PATTERN = re.compile(r'on\w+\s*=', re.IGNORECASE)
+# Échappement des caractères spéciaux en une seule passe
+HTML_ESCAPE_TABLE = str.maketrans({
+    '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#x27;'
+})
+
 def sanitize_email_content(content):
     """Sanitize le contenu d'un email pour éviter les attaques."""
     if not content:
         return ""
     
     # Supprimer tout code HTML potentiel
-    content = re.sub(r'<[^>]*>', '', content)
+    content = HTML_TAG_PATTERN.sub('', content)
     
     # Échapper les caractères spéciaux
-    content = content.replace('&', '&amp;')
-    content = content.replace('<', '&lt;')
-    content = content.replace('>', '&gt;')
-    content = content.replace('"', '&quot;')
-    content = content.replace("'", '&#x27;')
+    content = content.translate(HTML_ESCAPE_TABLE)
     
     # Supprimer les scripts JavaScript potentiels
-    content = re.sub(r'javascript:', '', content, flags=re.IGNORECASE)
-    content = re.sub(r'on\w+\s*=', '', content, flags=re.IGNORECASE)
+    content = JAVASCRIPT_PATTERN.sub('', content)
+    content = EVENT_HANDLER_PATTERN.sub('', content)
     
     return content
 
@@ -75,6 +80,9 @@ SUMMARY:
             else:
                 body += f"\n• {missing_forms_count} forms found in URL mapping but missing in extraction"
 
+        # Taux de remplissage de toutes les colonnes importées en une seule réduction
+        filled_counts = df[list(url_mapping_columns or []) + list(crm_data_columns or [])].notna().sum()
+
         # Ajouter les métriques pour les données de mapping URL
         if url_mapping_columns and len(url_mapping_columns) > 0:
             body += "\n\nURL MAPPING METRICS:"
@@ -82,7 +90,7 @@ SUMMARY:
                 # Sanitize le nom de colonne
                 col_name = sanitize_html(str(col_name))
                 try:
-                    filled_values = df[col_name].notna().sum()
+                    filled_values = filled_counts[col_name]
                     body += f"\n• {filled_values}/{total_forms} forms with {col_name} information"
                 except Exception as e:
                     logger.error(f"Error getting URL mapping metrics for {col_name}: {str(e)}")
@@ -94,7 +102,7 @@ SUMMARY:
                 # Sanitize le nom de colonne
                 col_name = sanitize_html(str(col_name))
                 try:
-                    filled_values = df[col_name].notna().sum()
+                    filled_values = filled_counts[col_name]
                     display_name = col_name.replace('CRM_', '')
                     body += f"\n• {filled_values}/{total_forms} forms with {display_name} information"
                 except Exception as e:
@@ -104,7 +112,7 @@ SUMMARY:
 
         # Points d'attention standard
         try:
-            bad_integration = df[df['Iframe'].str.contains("survey.dll", na=False)]
+            bad_integration = df[df['Iframe'].str.contains("survey.dll", na=False, regex=False)]
             if not bad_integration.empty:
                 body += f"\n• ⚠️ {len(bad_integration)} forms with incorrect integration"
         except Exception as e:
@@ -196,8 +204,9 @@ def display():
             total_forms = len(df)
             unique_forms = df['Form ID'].nunique()
             templated = df['Template'].notna().sum() if 'Template' in df.columns else 0
-            with_crm = df['CRM Campaign'].notna().sum()
-            without_crm = df['CRM Campaign'].isna().sum()
+            # Un seul masque pour les deux compteurs CRM
+            with_crm = int(df['CRM Campaign'].notna().sum())
+            without_crm = total_forms - with_crm
             
             # Compter les formulaires récupérés - CORRECTION ici
             recovered_forms = 0
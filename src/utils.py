@@ -1,17 +1,43 @@
 import re
+import csv
+import logging
 import requests
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
 from typing import Tuple, List, Optional
 from .config import Config
 import urllib.parse
 import os
 from pathlib import Path
 
+logger = logging.getLogger('utils')
+
+# Motifs compilés une seule fois, partagés par l'extraction unitaire et l'analyse vectorisée
+ID_PATTERN = re.compile(r'ID=([^&]+)')
+CODE_PATTERN = re.compile(r'CODE=([^&]+)')
+# Marqueurs de valeurs manquantes des CSV importés (ceux du parser C de pandas),
+# passés explicitement aux deux moteurs de lecture
+CSV_NA_VALUES = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+]
+# Structure générale d'une URL acceptée par is_valid_url
+URL_PATTERN = re.compile(
+    r'^(https?://)'  # http:// ou https:// obligatoire
+    r'([a-zA-Z0-9]([a-zA-Z0-9-]*[a-zA-Z0-9])?\.)+[a-zA-Z0-9]([a-zA-Z0-9-]*[a-zA-Z0-9])?'  # domaine
+    r'(/[a-zA-Z0-9._~:/?#[\]@!$&\'()*+,;=%-]*)?$'  # chemin, paramètres, etc.
+)
+
 def extract_id_and_code(url: str) -> Tuple[Optional[str], Optional[str]]:
     """Extrait l'ID et le code CRM d'une URL iframe."""
     if not url:
         return None, None
-    id_match = re.search(r'ID=([^&]+)', url)
-    code_match = re.search(r'CODE=([^&]+)', url)
+    id_match = ID_PATTERN.search(url)
+    code_match = CODE_PATTERN.search(url)
     return (id_match.group(1) if id_match else None,
             code_match.group(1) if code_match else None)
 
@@ -24,6 +50,8 @@ def create_session():
         'X-Requested-With': 'XMLHttpRequest',
         'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
         'Accept-Language': 'en-US,en;q=0.5',
+        # Compression négociée selon les décodeurs disponibles (gzip, deflate, br si brotli est installé)
+        'Accept-Encoding': ACCEPT_ENCODING,
         'DNT': '1',  # Do Not Track
         'Sec-Fetch-Dest': 'document',
         'Sec-Fetch-Mode': 'navigate',
@@ -31,6 +59,13 @@ def create_session():
         'Sec-Fetch-User': '?1',
         'Upgrade-Insecure-Requests': '1'
     })
+    # Connexions keep-alive par hôte dimensionnées sur les workers qui partagent la session ;
+    # lu à la création (Config.update() le modifie à l'exécution). pool_connections (nombre
+    # d'hôtes gardés en cache) reste à sa valeur par défaut
+    pool_size = Config.MAX_WORKERS
+    adapter = HTTPAdapter(pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
     return session
 
 def is_valid_url(url: str) -> bool:
@@ -47,13 +82,7 @@ def is_valid_url(url: str) -> bool:
         return False
     
     # Vérifier la structure générale de l'URL
-    url_pattern = re.compile(
-        r'^(https?://)'  # http:// ou https:// obligatoire
-        r'([a-zA-Z0-9]([a-zA-Z0-9-]*[a-zA-Z0-9])?\.)+[a-zA-Z0-9]([a-zA-Z0-9-]*[a-zA-Z0-9])?'  # domaine
-        r'(/[a-zA-Z0-9._~:/?#[\]@!$&\'()*+,;=%-]*)?$'  # chemin, paramètres, etc.
-    )
-    
-    if not url_pattern.match(url):
+    if not URL_PATTERN.match(url):
         return False
     
     # Assurer qu'il n'y a pas d'espaces ou caractères d'échappement
@@ -121,4 +150,43 @@ def get_project_root() -> Path:
 
 def get_data_file_path(filename: str) -> Path:
     """Retourne le chemin vers un fichier dans le dossier data."""
-    return get_project_root() / "data" / filename
\ No newline at end of file
+    return get_project_root() / "data" / filename
+
+def _read_csv_pyarrow(file, sep: str) -> pd.DataFrame:
+    """Lecture pyarrow multithreadée, toutes colonnes en texte (aucune inférence de types)."""
+    # Noms de colonnes lus sur la première ligne pour imposer le type texte à chacune
+    header = next(csv.reader([file.readline().decode('utf-8-sig')], delimiter=sep))
+    file.seek(0)
+    if len(set(header)) != len(header):
+        # Noms en double : seul le parser C sait les dédoublonner ('col', 'col.1')
+        raise ValueError("Duplicate column names in CSV header")
+    
+    table = pa_csv.read_csv(
+        file,
+        parse_options=pa_csv.ParseOptions(delimiter=sep),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: pa.string() for name in header},
+            null_values=CSV_NA_VALUES,
+            strings_can_be_null=True
+        )
+    )
+    if not all(pa.types.is_string(field.type) for field in table.schema):
+        raise ValueError("Unexpected CSV header")
+    
+    # Valeurs nulles en NaN, comme le parser C
+    return table.to_pandas().fillna(np.nan)
+
+def read_csv_file(file, sep: str) -> pd.DataFrame:
+    """Lit un CSV avec le parser multithreadé pyarrow, et le parser C en secours.
+    
+    Les deux moteurs lisent toutes les colonnes comme du texte, avec les mêmes marqueurs
+    de valeurs manquantes : le résultat ne dépend pas du moteur utilisé.
+    """
+    try:
+        return _read_csv_pyarrow(file, sep)
+    except Exception as e:
+        # pyarrow refuse certains fichiers (ex. retours à la ligne dans les valeurs)
+        logger.debug(f"pyarrow CSV parser failed, falling back to C parser: {str(e)}")
+        file.seek(0)
+        return pd.read_csv(file, sep=sep, encoding='utf-8', dtype=str,
+                           keep_default_na=False, na_values=CSV_NA_VALUES)
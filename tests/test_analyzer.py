@@ -0,0 +1,23 @@
+import pandas as pd
+
+from src.analysis import IframeAnalyzer
+
+RESULTS = [
+    {"URL source": "https://www.example.com/a", "Form ID": "F1",
+     "Iframe": "https://ovh.slgnt.eu/optiext/optiextension.dll?ID=F1&CODE=AB12"},
+    {"URL source": "https://www.example.com/b", "Form ID": "F2",
+     "Iframe": "https://ovh.slgnt.eu/optiext/optiextension.dll?ID=F2"},
+]
+
+
+def test_crm_campaign_dtype_does_not_depend_on_url_mapping():
+    mapping_data = pd.DataFrame({"URL": ["https://www.example.com/b"], "Form ID": ["F2"], "CRM Code": [123]})
+    config = {"url_column": "URL", "id_column": "Form ID"}
+    analyzer = IframeAnalyzer()
+
+    plain = analyzer.analyze_crm_data(RESULTS)
+    mapped = analyzer.analyze_crm_data(RESULTS, url_mapping_data=mapping_data, url_mapping_config=config)
+
+    assert plain["CRM Campaign"].dtype == mapped["CRM Campaign"].dtype == "string"
+    assert plain["CRM Campaign"].tolist() == ["AB12", pd.NA]
+    assert mapped["CRM Campaign"].tolist() == ["AB12", "123"]
@@ -0,0 +1,83 @@
+from io import BytesIO
+from unittest import mock
+
+import pandas as pd
+
+import src.utils
+
+from src.analysis import IframeAnalyzer
+from src.utils import read_csv_file
+
+PAGE_URL = "https://www.example.com/page"
+KNOWN_URL = "https://www.example.com/known"
+
+
+def make_result(url: str, code: str) -> dict:
+    iframe = f"https://ovh.slgnt.eu/optiext/optiextension.dll?ID=form1&CODE={code}"
+    return {"URL source": url, "Iframe": iframe, "Form ID": "form1", "CRM Campaign": code}
+
+
+def test_read_csv_file_keeps_empty_cells_missing():
+    data = read_csv_file(BytesIO(b"URL;CRM Code;Cluster\nhttps://a.com;;c1\n;ABC;\n"), ";")
+
+    assert data["CRM Code"].isna().tolist() == [True, False]
+    assert data["Cluster"].isna().tolist() == [False, True]
+    assert data["URL"].isna().tolist() == [False, True]
+
+
+def test_read_csv_file_engines_return_the_same_columns():
+    content = (
+        b"Code;Date;Time;Flag;Amount;Big;Note\n"
+        b"007;2024-01-01 10:00:00;10:30;TRUE;1e3;12345678901234567890;N/A\n"
+        b"ABC;;11:00;false;;1;x\n"
+    )
+
+    with_pyarrow = read_csv_file(BytesIO(content), ";")
+    with mock.patch.object(src.utils, "_read_csv_pyarrow", side_effect=ValueError("forced fallback")):
+        with_c_parser = read_csv_file(BytesIO(content), ";")
+
+    pd.testing.assert_frame_equal(with_pyarrow, with_c_parser)
+    assert with_pyarrow["Code"].tolist() == ["007", "ABC"]
+    assert with_pyarrow["Date"].tolist()[0] == "2024-01-01 10:00:00"
+    assert with_pyarrow["Note"].isna().tolist() == [True, False]
+
+
+def test_crm_mapping_ignores_empty_codes():
+    crm_data = read_csv_file(BytesIO(b"Code;Owner\n;Nobody\nABC;Alice\n"), ";")
+    config = {"crm_code_column": "Code", "selected_columns": ["Code", "Owner"]}
+
+    df = IframeAnalyzer().analyze_crm_data(
+        [make_result(PAGE_URL, "QQQ"), make_result(KNOWN_URL, "ABC123")],
+        crm_data=crm_data, crm_mapping_config=config
+    )
+
+    assert df["CRM_Owner"].tolist() == [None, "Alice"]
+
+
+def test_crm_mapping_never_matches_an_empty_key():
+    crm_data = pd.DataFrame({"Code": ["", "ABC"], "Owner": ["Nobody", "Alice"]})
+    config = {"crm_code_column": "Code", "selected_columns": ["Code", "Owner"]}
+
+    df = IframeAnalyzer().analyze_crm_data(
+        [make_result(PAGE_URL, "QQQ")], crm_data=crm_data, crm_mapping_config=config
+    )
+
+    assert df["CRM_Owner"].tolist() == [None]
+
+
+def test_url_mapping_does_not_fill_empty_cells():
+    mapping_data = read_csv_file(BytesIO(
+        b"URL;Form ID;CRM Campaign Code;Cluster\n"
+        + PAGE_URL.encode() + b";form1;;\n"
+        + KNOWN_URL.encode() + b";form2;ABC;c1\n"
+    ), ";")
+    config = {"url_column": "URL", "id_column": "Form ID"}
+    result = make_result(PAGE_URL, "")
+    result["Iframe"] = "https://ovh.slgnt.eu/optiext/optiextension.dll?ID=form1"
+
+    df = IframeAnalyzer().analyze_crm_data(
+        [result], url_mapping_data=mapping_data, url_mapping_config=config
+    )
+
+    assert df["CRM Campaign"].isna().all()
+    assert df["Cluster"].isna().all()
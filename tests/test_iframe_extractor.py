@@ -0,0 +1,55 @@
+from unittest import mock
+
+from src.config import Config
+from src.extractors import IframeExtractor
+
+IFRAME_SRC = "https://ovh.slgnt.eu/optiext/optiextension.dll?ID=abc123&CODE=CRM42"
+PAGE = (
+    "<html><head><title>Test</title></head><body>"
+    "<div><div><main>"
+    f'<iframe src="{IFRAME_SRC}"></iframe>'
+    '<iframe src="https://example.com/other"></iframe>'
+    "</main></div></div>"
+    "</body></html>"
+).encode("utf-8")
+
+
+def make_response(content: bytes, status_code: int = 200) -> mock.MagicMock:
+    """Réponse HTTP factice utilisable comme gestionnaire de contexte."""
+    response = mock.MagicMock()
+    response.status_code = status_code
+    response.headers = {"Content-Type": "text/html; charset=utf-8", "Content-Length": str(len(content))}
+    response.iter_content.return_value = [content]
+    response.__enter__.return_value = response
+    return response
+
+
+def test_extractor_init_freezes_config():
+    extractor = IframeExtractor()
+
+    assert extractor._timeout == Config.TIMEOUT
+    assert extractor._max_content_size == Config.MAX_CONTENT_SIZE
+
+
+def test_extract_from_url_returns_optiext_iframes():
+    extractor = IframeExtractor()
+    url = "https://www.example.com/page"
+
+    with mock.patch.object(extractor.session, "get", return_value=make_response(PAGE)) as get:
+        results = extractor.extract_from_url(url)
+
+    get.assert_called_once_with(url, timeout=Config.TIMEOUT, stream=True)
+    assert results == [{
+        "URL source": url,
+        "Iframe": IFRAME_SRC,
+        "Form ID": "abc123",
+        "CRM Campaign": "CRM42",
+    }]
+
+
+def test_extract_from_url_rejects_oversized_content():
+    extractor = IframeExtractor()
+    extractor._max_content_size = len(PAGE) - 1
+
+    with mock.patch.object(extractor.session, "get", return_value=make_response(PAGE)):
+        assert extractor.extract_from_url("https://www.example.com/page") == []
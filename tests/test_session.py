@@ -0,0 +1,16 @@
+from requests.adapters import DEFAULT_POOLSIZE
+
+from src.config import Config
+from src.utils import create_session
+
+
+def test_session_pool_follows_runtime_worker_count():
+    original_workers = Config.MAX_WORKERS
+    try:
+        Config.update(MAX_WORKERS=3)
+        adapter = create_session().get_adapter("https://www.example.com")
+
+        assert adapter._pool_maxsize == 3
+        assert adapter._pool_connections == DEFAULT_POOLSIZE
+    finally:
+        Config.update(MAX_WORKERS=original_workers)
@@ -0,0 +1,27 @@
+from unittest import mock
+
+from src.analysis import load_template_dataframe
+from src.analysis.analyzer import _load_template_mapping, _read_template_mapping
+
+
+def test_template_mapping_load_failure_is_not_cached():
+    _read_template_mapping.cache_clear()
+    try:
+        with mock.patch("src.utils.get_data_file_path", side_effect=OSError("transient")):
+            assert _load_template_mapping() is None
+
+        mapping = _load_template_mapping()
+        assert mapping is not None
+        assert _load_template_mapping() is mapping
+    finally:
+        _read_template_mapping.cache_clear()
+
+
+
+def test_load_template_dataframe_matches_mapping():
+    mapping = _load_template_mapping()
+
+    df = load_template_dataframe()
+
+    assert list(df.columns) == ["Form ID", "Template Name"]
+    assert dict(zip(df["Form ID"], df["Template Name"])) == dict(mapping)